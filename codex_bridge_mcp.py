@@ -1,17 +1,29 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import bisect
+import functools
 import json
+import mmap
 import os
 import queue
+import selectors
 import shutil
+import signal
 import subprocess
 import sys
 import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, stdlib json is the fallback
+    orjson = None
 
 
 MCP_PROTOCOL_VERSION = "2025-11-25"
@@ -43,23 +55,124 @@ JSONRPC_INVALID_PARAMS = -32602
 JSONRPC_INTERNAL_ERROR = -32603
 
 _ASYNC = object()
+# Queued by CodexBridgeServer.close() to stop the session writer after a final flush.
+_SESSION_WRITER_STOP = object()
+
+# How many upstream request id -> SessionInfo captures CodexMcpClient retains.
+_SESSION_BY_REQUEST_ID_MAX = 2048
+# tools/call workers mostly block on the upstream process, so size for concurrency
+# rather than CPU; beyond the pending cap new calls are rejected instead of queued.
+_TOOL_CALL_WORKERS = min(32, max(8, (os.cpu_count() or 1) * 4))
+_TOOL_CALL_MAX_PENDING = 256
+# Bridge-local tools (codex-bridge-*) only touch the session index and rollout
+# files; a few dedicated workers keep them from queueing behind long Codex turns.
+_LOCAL_TOOL_CALL_WORKERS = 4
+_LOCAL_TOOL_PREFIX = "codex-bridge-"
+# How many preceding exported messages a rollout response_item is checked against
+# before being treated as new rather than a duplicate of an event_msg.
+_EXPORT_DEDUP_WINDOW = 5
+# Buffer size for the Codex subprocess pipes (see CodexMcpClient.__init__).
+_CODEX_PIPE_BUFSIZE = 1 << 16
+
+
+def _write_stderr_bytes(data: bytes) -> None:
+    out = getattr(sys.stderr, "buffer", None)
+    if out is None:
+        sys.stderr.write(data.decode("utf-8", errors="replace"))
+        sys.stderr.flush()
+        return
+    out.write(data)
+    out.flush()
+
+
+def _forward_prefixed_lines(src: BinaryIO, prefix: bytes, chunk_size: int = 1 << 14) -> None:
+    """Copy src to our stderr until EOF, prefixing every line.
+
+    Reads whatever is available in one block and writes all complete lines in it
+    with a single write/flush, so a chatty child costs one syscall per burst
+    rather than one per line. A line longer than chunk_size is emitted in pieces.
+    """
+    pending = b""
+    # Set after breaking an overlong line, so the newline ending it is not
+    # forwarded as an extra empty line.
+    broke_line = False
+    while True:
+        chunk = src.read1(chunk_size)
+        if not chunk:
+            break
+        data = pending + chunk if pending else chunk
+        if broke_line and data.startswith(b"\n"):
+            data = data[1:]
+        broke_line = False
+        end = data.rfind(b"\n")
+        if end == -1:
+            if len(data) < chunk_size:
+                pending = data
+                continue
+            lines, pending = data, b""
+            broke_line = True
+        else:
+            lines, pending = data[:end], data[end + 1 :]
+        try:
+            _write_stderr_bytes(prefix + lines.replace(b"\n", b"\n" + prefix) + b"\n")
+        except (OSError, ValueError):
+            # Keep draining so the child never blocks on a full stderr pipe.
+            pass
+    if pending:
+        try:
+            _write_stderr_bytes(prefix + pending + b"\n")
+        except (OSError, ValueError):
+            pass
 
 
-def _eprint(*args: object) -> None:
-    print(*args, file=sys.stderr, flush=True)
+def _json_dumpb(obj: object) -> bytes:
+    """Serialize to compact UTF-8 JSON bytes (orjson when available)."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # orjson rejects a few inputs stdlib json accepts (non-str keys, >64-bit ints).
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _json_dumpb_line(obj: object) -> bytes:
+    """Like _json_dumpb but newline-terminated, for JSONL records and stdio frames.
+
+    orjson appends the newline in the same buffer, saving a copy of the frame.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
 
 
 def _json_dumps(obj: object) -> str:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            pass
     return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
 
 
-def _try_parse_json(line: str) -> Tuple[Optional[dict], Optional[int], Optional[str]]:
-    line = line.strip()
-    if not line:
+def _json_loads(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or bytes. Raises ValueError on malformed input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _try_parse_json(line: Union[str, bytes]) -> Tuple[Optional[dict], Optional[int], Optional[str]]:
+    # Both JSON backends skip surrounding whitespace themselves; avoid strip() so
+    # large frames (tool output, diffs) are not copied before parsing.
+    if not line or line.isspace():
         return None, None, None
     try:
-        msg = json.loads(line)
-    except json.JSONDecodeError:
+        msg = _json_loads(line)
+    except ValueError:
         return None, JSONRPC_PARSE_ERROR, "Parse error"
     if isinstance(msg, dict):
         return msg, None, None
@@ -71,21 +184,218 @@ def _jsonrpc_response(msg_id: Any, result: Any) -> dict:
 
 
 def _jsonrpc_error(msg_id: Any, code: int, message: str, data: Any = None) -> dict:
-    err: Dict[str, Any] = {"code": code, "message": message}
-    if data is not None:
-        err["data"] = data
-    return {"jsonrpc": "2.0", "id": msg_id, "error": err}
+    if data is None:
+        return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message}}
+    return {"jsonrpc": "2.0", "id": msg_id, "error": {"code": code, "message": message, "data": data}}
 
 
 def _tool_text_result(text: str, is_error: bool) -> dict:
     return {"content": [{"type": "text", "text": text}], "isError": bool(is_error)}
 
 
+def _tool_error(msg_id: Any, text: str) -> dict:
+    return _jsonrpc_response(msg_id, _tool_text_result(text, is_error=True))
+
+
+def _int_arg(args: dict, key: str, default: int, lo: int, hi: int) -> int:
+    """Read an optional integer tool argument, falling back to default and clamping to [lo, hi]."""
+    value = args.get(key, default)
+    if not isinstance(value, int):
+        value = default
+    return max(lo, min(hi, value))
+
+
 class CancelledError(RuntimeError):
     pass
 
 
-def _find_codex_binary() -> str:
+class CancelEvent(threading.Event):
+    """threading.Event that also runs registered callbacks when set.
+
+    Lets waiters block for their full timeout and still wake up promptly on
+    cancellation, instead of polling is_set().
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._callbacks: List[Callable[[], None]] = []
+        self._callbacks_lock = threading.Lock()
+
+    def add_callback(self, fn: Callable[[], None]) -> None:
+        with self._callbacks_lock:
+            self._callbacks.append(fn)
+
+    def remove_callback(self, fn: Callable[[], None]) -> None:
+        with self._callbacks_lock:
+            try:
+                self._callbacks.remove(fn)
+            except ValueError:
+                pass
+
+    def set(self) -> None:
+        super().set()
+        with self._callbacks_lock:
+            callbacks = list(self._callbacks)
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                pass
+
+
+class _PendingReply:
+    """One-shot slot for an upstream response (lighter than a Queue or Future)."""
+
+    __slots__ = ("event", "msg", "error", "_lock")
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.msg: Optional[dict] = None
+        self.error: Optional[BaseException] = None
+        # The reader thread and a cancel callback may race to settle the slot;
+        # the first outcome wins and later calls are ignored.
+        self._lock = threading.Lock()
+
+    def resolve(self, msg: dict) -> None:
+        with self._lock:
+            if self.event.is_set():
+                return
+            self.msg = msg
+            self.event.set()
+
+    def fail(self, exc: BaseException) -> None:
+        with self._lock:
+            if self.event.is_set():
+                return
+            self.error = exc
+            self.event.set()
+
+    def result(self) -> dict:
+        if self.error is not None:
+            raise self.error
+        assert self.msg is not None
+        return self.msg
+
+
+def _iter_mmap_lines(mm: mmap.mmap) -> Iterator[bytes]:
+    """Yield newline-delimited byte slices of a memory-mapped file."""
+    start = 0
+    size = len(mm)
+    while start < size:
+        end = mm.find(b"\n", start)
+        if end == -1:
+            end = size
+        yield mm[start:end]
+        start = end + 1
+
+
+def _read_tail_lines(
+    path: Path, count: int, count_lines: bool = True, block_size: int = 1 << 13
+) -> Tuple[List[bytes], Optional[int]]:
+    """Return the last count lines of path (newlines kept) and its total line count.
+
+    With count_lines=False the total is None and only the tail is read, backwards
+    from the end, so I/O stays at a few blocks however large the file is. Counting
+    has to scan the whole file; that single forward pass keeps its last blocks and
+    takes the tail from them instead of reading it again. Memory is O(tail) either way.
+    """
+    # Both loops stop once the kept blocks hold one newline more than requested,
+    # which guarantees the oldest kept line is whole.
+    blocks: deque = deque()
+    total: Optional[int] = None
+    with path.open("rb") as f:
+        if count_lines:
+            total = 0
+            newlines = 0
+            last = b""
+            while True:
+                block = f.read(block_size * 8)
+                if not block:
+                    break
+                n = block.count(b"\n")
+                total += n
+                newlines += n
+                last = block[-1:]
+                blocks.append((block, n))
+                while len(blocks) > 1 and newlines - blocks[0][1] > count:
+                    newlines -= blocks.popleft()[1]
+            if last and last != b"\n":
+                total += 1
+            tail = b"".join(block for block, _ in blocks)
+        else:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            newlines = 0
+            while pos > 0 and newlines <= count:
+                step = min(block_size, pos)
+                pos -= step
+                f.seek(pos)
+                block = f.read(step)
+                blocks.appendleft(block)
+                newlines += block.count(b"\n")
+            tail = b"".join(blocks)
+
+    parts = tail.split(b"\n")
+    lines = [part + b"\n" for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines[-count:], total
+
+
+def _iter_fd_lines(fd: int, stop_fd: int, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+    """Yield newline-delimited frames read from fd until EOF or stop_fd is readable.
+
+    Reads whole chunks with os.read and splits them in place, so a burst of small
+    frames costs one syscall. A frame spanning many reads is accumulated in one
+    bytearray and only the new bytes are searched for its newline, so large frames
+    stay linear. poll() is used rather than epoll because stdin may be a regular
+    file (`< requests.jsonl`), which epoll refuses to register.
+    """
+    selector_cls = getattr(selectors, "PollSelector", selectors.SelectSelector)
+    buf = bytearray()
+    with selector_cls() as sel:
+        sel.register(fd, selectors.EVENT_READ)
+        sel.register(stop_fd, selectors.EVENT_READ)
+        while True:
+            ready = sel.select()
+            if any(key.fd == stop_fd for key, _ in ready):
+                return
+            try:
+                chunk = os.read(fd, chunk_size)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+            # Bytes already in buf were searched on earlier reads and hold no newline.
+            end = chunk.find(b"\n")
+            if end == -1:
+                buf += chunk
+                continue
+            if buf:
+                end += len(buf)
+                buf += chunk
+                data = bytes(buf)
+            else:
+                data = chunk
+            start = 0
+            while end != -1:
+                yield data[start:end]
+                start = end + 1
+                end = data.find(b"\n", start)
+            # The unterminated tail came from this chunk, so it is at most chunk_size.
+            buf = bytearray(data[start:])
+    if buf:
+        yield bytes(buf)
+
+
+_VSCODE_EXTENSION_DIRS = (
+    Path(".vscode-insiders") / "extensions",
+    Path(".vscode") / "extensions",
+)
+_CODEX_BINARY_CACHE_FILE = "codex-binary.json"
+
+
+def _find_codex_binary(state_dir: Optional[Path] = None) -> str:
     env_path = os.environ.get("CODEX_BINARY") or os.environ.get("CODEX_BIN")
     if env_path and Path(env_path).exists():
         return env_path
@@ -99,29 +409,128 @@ def _find_codex_binary() -> str:
         return which
 
     # Fall back to common VS Code extension locations.
-    home = Path.home()
-    candidates = []
-    for base in (
-        home / ".vscode-insiders" / "extensions",
-        home / ".vscode" / "extensions",
-    ):
-        if not base.exists():
-            continue
-        for ext_dir in base.glob("openai.chatgpt-*"):
-            # Known layout: bin/<platform>/codex
-            for codex_path in ext_dir.glob("bin/**/codex"):
-                if codex_path.is_file():
-                    candidates.append(codex_path)
-    if candidates:
-        # Pick the most recently modified candidate.
-        candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        return str(candidates[0])
+    found = _find_vscode_codex_binary(state_dir)
+    if found:
+        return found
 
     raise FileNotFoundError(
         "Could not locate the Codex CLI binary. Set CODEX_BINARY to an absolute path."
     )
 
 
+def _find_vscode_codex_binary(state_dir: Optional[Path]) -> Optional[str]:
+    """Find the newest Codex binary bundled with the VS Code extension.
+
+    The scan result is cached in state_dir and reused while the extension
+    directories and the chosen binary are unchanged (same mtimes).
+    """
+    home = Path.home()
+    base_mtimes: Dict[str, int] = {}
+    for rel in _VSCODE_EXTENSION_DIRS:
+        base = home / rel
+        if not base.exists():
+            continue
+        try:
+            base_mtimes[str(base)] = base.stat().st_mtime_ns
+        except OSError:
+            continue
+    if not base_mtimes:
+        return None
+
+    cache_path = state_dir / _CODEX_BINARY_CACHE_FILE if state_dir is not None else None
+    if cache_path is not None:
+        cached = _read_codex_binary_cache(cache_path, base_mtimes)
+        if cached:
+            return cached
+
+    best: Optional[str] = None
+    best_mtime = -1
+    for base in base_mtimes:
+        for ext_dir in Path(base).glob("openai.chatgpt-*"):
+            for codex_path in _iter_extension_codex_binaries(ext_dir):
+                try:
+                    mtime = os.stat(codex_path).st_mtime_ns
+                except OSError:
+                    continue
+                # Pick the most recently modified candidate.
+                if mtime > best_mtime:
+                    best, best_mtime = codex_path, mtime
+    if best is not None and cache_path is not None:
+        record = {"path": best, "mtimeNs": best_mtime, "extensionDirs": base_mtimes}
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_bytes(_json_dumpb(record))
+        except OSError:
+            pass
+    return best
+
+
+def _iter_extension_codex_binaries(ext_dir: Path) -> Iterator[str]:
+    """Yield codex binaries in an extension dir (known layout: bin/<platform>/codex).
+
+    Only bin/codex and bin/*/codex are checked, instead of a recursive walk.
+    """
+    bin_dir = os.path.join(ext_dir, "bin")
+    direct = os.path.join(bin_dir, "codex")
+    if os.path.isfile(direct):
+        yield direct
+    try:
+        entries = list(os.scandir(bin_dir))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.is_dir():
+            candidate = os.path.join(entry.path, "codex")
+            if os.path.isfile(candidate):
+                yield candidate
+
+
+def _read_codex_binary_cache(cache_path: Path, base_mtimes: Dict[str, int]) -> Optional[str]:
+    try:
+        record = _json_loads(cache_path.read_bytes())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or record.get("extensionDirs") != base_mtimes:
+        return None
+    path = record.get("path")
+    if not isinstance(path, str):
+        return None
+    try:
+        if os.stat(path).st_mtime_ns != record.get("mtimeNs"):
+            return None
+    except OSError:
+        return None
+    return path
+
+
+# Optional SessionInfo fields shared by session_configured events and
+# sessions.jsonl records, grouped by the type they must have to be kept.
+_SESSION_STR_FIELDS = ("model", "model_provider_id", "approval_policy", "cwd", "reasoning_effort", "rollout_path")
+_SESSION_INT_FIELDS = ("history_log_id", "history_entry_count")
+# String fields that repeat across most sessions; interned so a large index holds
+# one copy of each distinct value instead of one per record.
+_SESSION_INTERNED_FIELDS = ("model", "model_provider_id", "approval_policy", "cwd", "reasoning_effort")
+
+
+def _typed_session_fields(src: dict) -> Dict[str, Any]:
+    """Copy the optional SessionInfo fields from src, dropping mistyped values."""
+    get = src.get
+    fields: Dict[str, Any] = {}
+    for k in _SESSION_STR_FIELDS:
+        v = get(k)
+        fields[k] = v if isinstance(v, str) else None
+    for k in _SESSION_INT_FIELDS:
+        v = get(k)
+        fields[k] = v if isinstance(v, int) else None
+    v = get("sandbox_policy")
+    fields["sandbox_policy"] = v if isinstance(v, dict) else None
+    for k in _SESSION_INTERNED_FIELDS:
+        v = fields[k]
+        if v is not None:
+            fields[k] = sys.intern(v)
+    return fields
+
+
 @dataclass(frozen=True)
 class SessionInfo:
     conversation_id: str
@@ -137,9 +546,54 @@ class SessionInfo:
     history_entry_count: Optional[int] = None
     name: Optional[str] = None
 
+    def to_record(self) -> dict:
+        """Convert to the JSON-serializable record stored in sessions.jsonl."""
+        return {
+            "conversation_id": self.conversation_id,
+            "captured_at": self.captured_at,
+            "model": self.model,
+            "model_provider_id": self.model_provider_id,
+            "approval_policy": self.approval_policy,
+            "sandbox_policy": self.sandbox_policy,
+            "cwd": self.cwd,
+            "reasoning_effort": self.reasoning_effort,
+            "rollout_path": self.rollout_path,
+            "history_log_id": self.history_log_id,
+            "history_entry_count": self.history_entry_count,
+            "name": self.name,
+        }
+
+    @functools.cached_property
+    def json_line(self) -> bytes:
+        """The sessions.jsonl line for this record, encoded once per instance."""
+        return _json_dumpb_line(self.to_record())
+
+    @functools.cached_property
+    def name_lower(self) -> str:
+        """Lowercased name for case-insensitive search ("" when unnamed)."""
+        return self.name.lower() if self.name else ""
+
+    @functools.cached_property
+    def payload(self) -> dict:
+        """The camelCase form returned by the session tools; shared, treat as read-only."""
+        return {
+            "conversationId": self.conversation_id,
+            "name": self.name,
+            "capturedAt": self.captured_at,
+            "model": self.model,
+            "modelProviderId": self.model_provider_id,
+            "approvalPolicy": self.approval_policy,
+            "sandboxPolicy": self.sandbox_policy,
+            "cwd": self.cwd,
+            "reasoningEffort": self.reasoning_effort,
+            "rolloutPath": self.rollout_path,
+            "historyLogId": self.history_log_id,
+            "historyEntryCount": self.history_entry_count,
+        }
+
     def with_name(self, name: str) -> "SessionInfo":
         """Return a new SessionInfo with the given name."""
-        return SessionInfo(
+        updated = SessionInfo(
             conversation_id=self.conversation_id,
             captured_at=self.captured_at,
             model=self.model,
@@ -153,11 +607,12 @@ class SessionInfo:
             history_entry_count=self.history_entry_count,
             name=name,
         )
+        return self._carry_payload(updated, "name", name)
 
     def with_incremented_history(self) -> "SessionInfo":
         """Return a new SessionInfo with history_entry_count incremented by 1."""
         current = self.history_entry_count or 0
-        return SessionInfo(
+        updated = SessionInfo(
             conversation_id=self.conversation_id,
             captured_at=self.captured_at,
             model=self.model,
@@ -171,44 +626,95 @@ class SessionInfo:
             history_entry_count=current + 1,
             name=self.name,
         )
+        return self._carry_payload(updated, "historyEntryCount", current + 1)
+
+    def _carry_payload(self, updated: "SessionInfo", key: str, value: Any) -> "SessionInfo":
+        # If this instance's payload was already built, derive the copy's payload
+        # from it with one merge instead of reshaping every field again.
+        cached = self.__dict__.get("payload")
+        if cached is not None:
+            updated.__dict__["payload"] = {**cached, key: value}
+        return updated
 
     @staticmethod
     def from_session_configured_event(event: dict, name: Optional[str] = None) -> Optional["SessionInfo"]:
         session_id = event.get("session_id")
         if not isinstance(session_id, str) or not session_id:
             return None
-        sandbox_policy = event.get("sandbox_policy")
-        if sandbox_policy is not None and not isinstance(sandbox_policy, dict):
-            sandbox_policy = None
         return SessionInfo(
             conversation_id=session_id,
             captured_at=time.time(),
-            model=event.get("model") if isinstance(event.get("model"), str) else None,
-            model_provider_id=event.get("model_provider_id")
-            if isinstance(event.get("model_provider_id"), str)
-            else None,
-            approval_policy=event.get("approval_policy")
-            if isinstance(event.get("approval_policy"), str)
-            else None,
-            sandbox_policy=sandbox_policy,
-            cwd=event.get("cwd") if isinstance(event.get("cwd"), str) else None,
-            reasoning_effort=event.get("reasoning_effort")
-            if isinstance(event.get("reasoning_effort"), str)
-            else None,
-            rollout_path=event.get("rollout_path")
-            if isinstance(event.get("rollout_path"), str)
-            else None,
-            history_log_id=event.get("history_log_id")
-            if isinstance(event.get("history_log_id"), int)
-            else None,
-            history_entry_count=event.get("history_entry_count")
-            if isinstance(event.get("history_entry_count"), int)
-            else None,
             name=name,
+            **_typed_session_fields(event),
         )
 
 
+class _NameSearchIndex:
+    """Lowercased session names joined into one string, newest session first.
+
+    A substring search becomes str.find() over the joined names instead of a
+    Python-level loop over every session. Names are separated by NUL, so a query
+    without NUL can only match inside a single name.
+    """
+
+    __slots__ = ("version", "haystack", "starts", "ids")
+
+    def __init__(self, version: int, order: List[str], by_id: Dict[str, SessionInfo]) -> None:
+        self.version = version
+        self.starts: List[int] = []
+        self.ids: List[str] = []
+        parts: List[str] = []
+        pos = 0
+        by_id_get = by_id.get
+        for cid in reversed(order):
+            info = by_id_get(cid)
+            if info is None or not info.name:
+                continue
+            name_lower = info.name_lower
+            self.starts.append(pos)
+            self.ids.append(cid)
+            parts.append(name_lower)
+            pos += len(name_lower) + 1
+        self.haystack = "\0".join(parts)
+
+    def search(
+        self, query_lower: str, limit: int, lookup: Callable[[str], Optional[SessionInfo]]
+    ) -> List[SessionInfo]:
+        haystack, starts, ids = self.haystack, self.starts, self.ids
+        results: List[SessionInfo] = []
+        pos = haystack.find(query_lower)
+        while pos != -1:
+            i = bisect.bisect_right(starts, pos) - 1
+            info = lookup(ids[i])
+            if info is not None:
+                results.append(info)
+                if len(results) >= limit:
+                    break
+            # At most one hit per name: resume at the start of the next one.
+            if i + 1 >= len(starts):
+                break
+            pos = haystack.find(query_lower, starts[i + 1])
+        return results
+
+
+# sessions.jsonl is rewritten only once superseded records and tombstones outnumber
+# both this floor and half the live sessions.
+_SESSIONS_COMPACT_MIN_STALE = 64
+
+
 class SessionStore:
+    """Session index backed by an append-only sessions.jsonl file.
+
+    Updates append the new record and deletes append a tombstone; on load the
+    last record per conversation_id wins. The file is compacted once stale lines
+    dominate (see _maybe_compact).
+
+    Writers serialize on _lock. Readers take no lock: they only perform single
+    dict/list operations (get, len, slice, values snapshot), which are atomic
+    under the GIL, and writers never mutate _order except by appending or
+    rebinding it to a new list.
+    """
+
     def __init__(self, state_dir: Path) -> None:
         self._state_dir = state_dir
         self._state_dir.mkdir(parents=True, exist_ok=True)
@@ -216,106 +722,148 @@ class SessionStore:
         self._lock = threading.Lock()
         self._by_id: Dict[str, SessionInfo] = {}
         self._order: List[str] = []
+        # Persistent O_APPEND descriptor for add(); opened lazily, see _append_fd().
+        self._fd: Optional[int] = None
+        self._membership_version = 0
+        # Bumped on every change to a live session, including renames and history bumps.
+        self._version = 0
+        # Live session count per model, in first-seen order; see models().
+        self._model_counts: Dict[str, int] = {}
+        # Bumped whenever the set of names changes; keys _search_index.
+        self._names_version = 0
+        self._search_index: Optional[_NameSearchIndex] = None
+        # Lines in the file that no longer describe a live session.
+        self._stale_lines = 0
         self._load()
+        with self._lock:
+            self._maybe_compact()
 
     @property
     def path(self) -> Path:
         return self._path
 
+    @property
+    def membership_version(self) -> int:
+        """Bumped whenever sessions are added or deleted (not on renames or history bumps)."""
+        return self._membership_version
+
+    @property
+    def version(self) -> int:
+        """Bumped whenever any live session changes; keys cached renderings of the store."""
+        return self._version
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                try:
+                    os.close(self._fd)
+                except OSError:
+                    pass
+                self._fd = None
+
+    def _append_fd(self) -> int:
+        """Return the append descriptor, opening it on first use (caller must hold lock).
+
+        O_APPEND makes each os.write land atomically at the current end of file,
+        including after _rewrite_file truncates it in place.
+        """
+        if self._fd is None:
+            self._fd = os.open(str(self._path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        return self._fd
+
     def _load(self) -> None:
         if not self._path.exists():
             return
         try:
-            with self._path.open("r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    if not isinstance(obj, dict):
-                        continue
-                    conversation_id = obj.get("conversation_id")
-                    if not isinstance(conversation_id, str) or not conversation_id:
-                        continue
-                    try:
-                        info = SessionInfo(
-                            conversation_id=conversation_id,
-                            captured_at=float(obj.get("captured_at") or time.time()),
-                            model=obj.get("model") if isinstance(obj.get("model"), str) else None,
-                            model_provider_id=obj.get("model_provider_id")
-                            if isinstance(obj.get("model_provider_id"), str)
-                            else None,
-                            approval_policy=obj.get("approval_policy")
-                            if isinstance(obj.get("approval_policy"), str)
-                            else None,
-                            sandbox_policy=obj.get("sandbox_policy")
-                            if isinstance(obj.get("sandbox_policy"), dict)
-                            else None,
-                            cwd=obj.get("cwd") if isinstance(obj.get("cwd"), str) else None,
-                            reasoning_effort=obj.get("reasoning_effort")
-                            if isinstance(obj.get("reasoning_effort"), str)
-                            else None,
-                            rollout_path=obj.get("rollout_path")
-                            if isinstance(obj.get("rollout_path"), str)
-                            else None,
-                            history_log_id=obj.get("history_log_id")
-                            if isinstance(obj.get("history_log_id"), int)
-                            else None,
-                            history_entry_count=obj.get("history_entry_count")
-                            if isinstance(obj.get("history_entry_count"), int)
-                            else None,
-                            name=obj.get("name") if isinstance(obj.get("name"), str) else None,
-                        )
-                    except Exception:
-                        continue
-                    if conversation_id not in self._by_id:
-                        self._order.append(conversation_id)
-                    self._by_id[conversation_id] = info
-        except OSError:
+            with self._path.open("rb") as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    self._load_lines(_iter_mmap_lines(mm))
+        except (OSError, ValueError):
             return
 
-    def _session_to_record(self, info: SessionInfo) -> dict:
-        """Convert a SessionInfo to a JSON-serializable record."""
-        return {
-            "conversation_id": info.conversation_id,
-            "captured_at": info.captured_at,
-            "model": info.model,
-            "model_provider_id": info.model_provider_id,
-            "approval_policy": info.approval_policy,
-            "sandbox_policy": info.sandbox_policy,
-            "cwd": info.cwd,
-            "reasoning_effort": info.reasoning_effort,
-            "rollout_path": info.rollout_path,
-            "history_log_id": info.history_log_id,
-            "history_entry_count": info.history_entry_count,
-            "name": info.name,
-        }
+    def _load_lines(self, lines: Iterator[bytes]) -> None:
+        records = 0
+        for line in lines:
+            # The JSON backends skip surrounding whitespace (including a CRLF's
+            # \r) themselves, so no strip() copy; a blank line just fails to parse.
+            if not line:
+                continue
+            try:
+                obj = _json_loads(line)
+            except ValueError:
+                continue
+            if not isinstance(obj, dict):
+                continue
+            conversation_id = obj.get("conversation_id")
+            if not isinstance(conversation_id, str) or not conversation_id:
+                continue
+            records += 1
+            if obj.get("_deleted") is True:
+                self._by_id.pop(conversation_id, None)
+                continue
+            name = obj.get("name")
+            try:
+                info = SessionInfo(
+                    conversation_id=conversation_id,
+                    captured_at=float(obj.get("captured_at") or time.time()),
+                    name=name if isinstance(name, str) else None,
+                    **_typed_session_fields(obj),
+                )
+            except Exception:
+                continue
+            # A rewrite keeps its position; a re-add after a tombstone moves to the end.
+            self._by_id[conversation_id] = info
+        self._order = list(self._by_id)
+        self._stale_lines = records - len(self._by_id)
+        for info in self._by_id.values():
+            self._count_model(info.model, 1)
 
     def _rewrite_file(self) -> None:
         """Rewrite the entire sessions file from memory (caller must hold lock)."""
         try:
-            with self._path.open("w", encoding="utf-8") as f:
+            with self._path.open("wb") as f:
                 for cid in self._order:
                     info = self._by_id.get(cid)
                     if info is not None:
-                        f.write(_json_dumps(self._session_to_record(info)) + "\n")
+                        f.write(info.json_line)
+        except OSError:
+            return
+        self._stale_lines = 0
+
+    def _append(self, data: bytes) -> None:
+        """Append pre-encoded lines to the file (caller must hold lock)."""
+        try:
+            os.write(self._append_fd(), data)
         except OSError:
             pass
 
+    def _maybe_compact(self) -> None:
+        """Rewrite the file once stale lines exceed both the floor and half the live count (caller must hold lock)."""
+        if self._stale_lines > max(_SESSIONS_COMPACT_MIN_STALE, len(self._by_id) // 2):
+            self._rewrite_file()
+
     def add(self, info: SessionInfo) -> None:
+        self.add_many((info,))
+
+    def add_many(self, infos: Iterable[SessionInfo]) -> None:
+        """Add sessions not already known, persisting them with a single append."""
         with self._lock:
-            if info.conversation_id in self._by_id:
+            lines = []
+            for info in infos:
+                if info.conversation_id in self._by_id:
+                    continue
+                self._by_id[info.conversation_id] = info
+                self._order.append(info.conversation_id)
+                self._count_model(info.model, 1)
+                lines.append(info.json_line)
+            if not lines:
                 return
-            self._by_id[info.conversation_id] = info
-            self._order.append(info.conversation_id)
-            try:
-                with self._path.open("a", encoding="utf-8") as f:
-                    f.write(_json_dumps(self._session_to_record(info)) + "\n")
-            except OSError:
-                pass
+            self._membership_version += 1
+            self._names_version += 1
+            self._version += 1
+            self._append(b"".join(lines))
 
     def update(self, conversation_id: str, name: Optional[str] = None) -> Optional[SessionInfo]:
         """Update a session's name. Returns the updated SessionInfo or None if not found."""
@@ -326,33 +874,77 @@ class SessionStore:
             if name is not None:
                 updated = existing.with_name(name)
                 self._by_id[conversation_id] = updated
-                self._rewrite_file()
+                self._names_version += 1
+                self._version += 1
+                self._append(updated.json_line)
+                self._stale_lines += 1
+                self._maybe_compact()
                 return updated
             return existing
 
     def search(self, query: str, limit: int = 50) -> List[SessionInfo]:
-        """Search sessions by name (case-insensitive substring match)."""
+        """Search sessions by name (case-insensitive substring match), newest first."""
         query_lower = query.lower()
-        with self._lock:
-            results = []
-            for cid in reversed(self._order):
-                info = self._by_id.get(cid)
-                if info is None:
-                    continue
-                if info.name and query_lower in info.name.lower():
-                    results.append(info)
-                    if len(results) >= limit:
-                        break
-            return results
+        if query_lower and "\0" not in query_lower:
+            return self._search_index_for_names().search(query_lower, limit, self._by_id.get)
+        by_id_get = self._by_id.get
+        results = []
+        for cid in reversed(self._order):
+            info = by_id_get(cid)
+            if info is None:
+                continue
+            # name_lower is cached per SessionInfo, so repeated searches do not re-lower.
+            if info.name and query_lower in info.name_lower:
+                results.append(info)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def search_page(self, query: str, limit: int = 50, cursor: Optional[str] = None) -> dict:
+        """One page of search() results, shaped like list(): {"data", "nextCursor"}."""
+        start = 0
+        if cursor is not None:
+            try:
+                start = int(cursor)
+            except ValueError:
+                start = 0
+        start = max(0, start)
+        end = start + max(1, limit)
+        # search() stops at its limit, so one extra match is enough to tell
+        # whether another page exists without collecting every hit.
+        results = self.search(query, limit=end + 1)
+        items = [_session_info_payload(info) for info in results[start:end]]
+        next_cursor = str(end) if len(results) > end else None
+        return {"data": items, "nextCursor": next_cursor}
+
+    def _search_index_for_names(self) -> "_NameSearchIndex":
+        """Return the name index for the current names, rebuilding it if stale."""
+        # Read the version first: a change mid-build only forces one extra rebuild.
+        version = self._names_version
+        index = self._search_index
+        if index is None or index.version != version:
+            index = self._search_index = _NameSearchIndex(version, self._order, self._by_id)
+        return index
 
     def delete(self, conversation_id: str) -> bool:
         """Delete a session by conversation_id. Returns True if deleted."""
         with self._lock:
-            if conversation_id not in self._by_id:
+            removed = self._by_id.pop(conversation_id, None)
+            if removed is None:
                 return False
-            del self._by_id[conversation_id]
-            self._order = [cid for cid in self._order if cid != conversation_id]
-            self._rewrite_file()
+            self._count_model(removed.model, -1)
+            # Copy-and-rebind so lock-free readers keep a consistent snapshot; the
+            # copy and remove() both run in C rather than a per-item Python loop.
+            order = self._order.copy()
+            order.remove(conversation_id)
+            self._order = order
+            self._membership_version += 1
+            self._names_version += 1
+            self._version += 1
+            self._append(_json_dumpb_line({"conversation_id": conversation_id, "_deleted": True}))
+            # The superseded record and the tombstone itself.
+            self._stale_lines += 2
+            self._maybe_compact()
             return True
 
     def increment_history(self, conversation_id: str) -> Optional[SessionInfo]:
@@ -363,59 +955,118 @@ class SessionStore:
                 return None
             updated = existing.with_incremented_history()
             self._by_id[conversation_id] = updated
-            self._rewrite_file()
+            self._version += 1
+            self._append(updated.json_line)
+            self._stale_lines += 1
+            self._maybe_compact()
             return updated
 
     def get(self, conversation_id: str) -> Optional[SessionInfo]:
-        with self._lock:
-            return self._by_id.get(conversation_id)
+        return self._by_id.get(conversation_id)
+
+    def values(self) -> List[SessionInfo]:
+        """Snapshot of all sessions, in no particular order."""
+        return list(self._by_id.values())
+
+    def models(self) -> List[str]:
+        """Distinct models of the live sessions, kept up to date on add and delete."""
+        return list(self._model_counts)
+
+    def _count_model(self, model: Optional[str], delta: int) -> None:
+        """Adjust the live-session count for model (caller must hold lock or be loading)."""
+        if not model:
+            return
+        count = self._model_counts.get(model, 0) + delta
+        if count > 0:
+            self._model_counts[model] = count
+        else:
+            self._model_counts.pop(model, None)
 
     def list(self, limit: int = 50, cursor: Optional[str] = None) -> dict:
-        with self._lock:
-            start = 0
-            if cursor is not None:
-                try:
-                    start = int(cursor)
-                except ValueError:
-                    start = 0
-            start = max(0, start)
-            ids = list(reversed(self._order))
-            end = min(len(ids), start + max(1, limit))
-            items = []
-            for cid in ids[start:end]:
-                info = self._by_id.get(cid)
-                if info is None:
-                    continue
-                items.append(_session_info_payload(info))
-            next_cursor = str(end) if end < len(ids) else None
-            return {"data": items, "nextCursor": next_cursor}
+        start = 0
+        if cursor is not None:
+            try:
+                start = int(cursor)
+            except ValueError:
+                start = 0
+        start = max(0, start)
+        # The cursor is an offset from the newest session; slice only the
+        # requested window off the tail of _order instead of reversing it all.
+        order = self._order
+        total = len(order)
+        end = min(total, start + max(1, limit))
+        if start < end:
+            window = order[total - end : total - start]
+            window.reverse()
+        else:
+            window = []
+        by_id_get = self._by_id.get
+        items = [_session_info_payload(info) for info in map(by_id_get, window) if info is not None]
+        next_cursor = str(end) if end < total else None
+        return {"data": items, "nextCursor": next_cursor}
 
     def count(self) -> int:
-        with self._lock:
-            return len(self._by_id)
+        return len(self._by_id)
+
+
+# The stdout reader only acts on responses (top-level "result"/"error") and on
+# session_configured events. Quotes inside JSON string values are escaped, so
+# these quoted tokens can only match structural keys and values; frames with none
+# of them (agent deltas, token counts, exec output, ...) are skipped undecoded.
+_EVENT_METHOD_TOKEN = b'"method":"codex/event"'
+_SESSION_CONFIGURED_TOKEN = b'"session_configured"'
+_RESPONSE_TOKENS = (b'"result"', b'"error"')
+
+
+def _is_dispatchable_frame(raw: bytes) -> bool:
+    if _EVENT_METHOD_TOKEN in raw:
+        # Events may carry "result"/"error" in their payloads (tool call ends,
+        # error events); only session_configured is worth decoding.
+        return _SESSION_CONFIGURED_TOKEN in raw
+    if _SESSION_CONFIGURED_TOKEN in raw:
+        return True
+    for token in _RESPONSE_TOKENS:
+        if token in raw:
+            return True
+    return False
+
+
+def _cancel_poll_interval(cancel_event: Optional[threading.Event]) -> Optional[float]:
+    if cancel_event is None or isinstance(cancel_event, CancelEvent):
+        return None
+    return 0.25
 
 
 class CodexMcpClient:
     def __init__(self, codex_binary: str, on_session_configured: Optional[callable] = None) -> None:
         self._codex_binary = codex_binary
         self._on_session_configured = on_session_configured
+        # Keep this spawn cheap: no preexec_fn/user/group options, so CPython can
+        # use vfork() on Linux, and close_fds so the child doesn't inherit the
+        # bridge's sessions.jsonl descriptor or client pipes. The environment is
+        # inherited as-is because Codex reads auth and config from it. Pipe buffers
+        # match the Linux pipe capacity so a burst of streamed events is pulled
+        # into the stdout reader with one read() rather than one per 8 KiB.
         self._proc = subprocess.Popen(
             [codex_binary, "mcp-server"],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            bufsize=_CODEX_PIPE_BUFSIZE,
+            close_fds=True,
         )
         self._next_id = 1
         self._id_lock = threading.Lock()
-        self._pending: Dict[int, queue.Queue] = {}
-        self._pending_lock = threading.Lock()
+        # Single-key dict ops are atomic under the GIL; each request id has exactly
+        # one waiter and one resolver, so no lock is needed around _pending.
+        self._pending: Dict[int, _PendingReply] = {}
         self._write_lock = threading.Lock()
-        self._session_by_request_id: Dict[int, SessionInfo] = {}
+        # Oldest-first; bounded to _SESSION_BY_REQUEST_ID_MAX entries.
+        self._session_by_request_id: "OrderedDict[int, SessionInfo]" = OrderedDict()
         self._session_lock = threading.Lock()
         self._session_cv = threading.Condition(self._session_lock)
         self._server_info: Optional[dict] = None
+        self._stdout_closed = False
 
         self._stdout_thread = threading.Thread(target=self._read_stdout, daemon=True)
         self._stdout_thread.start()
@@ -443,12 +1094,31 @@ class CodexMcpClient:
 
     def _read_stderr(self) -> None:
         assert self._proc.stderr is not None
-        for line in self._proc.stderr:
-            _eprint("[codex] " + line.rstrip("\n"))
+        _forward_prefixed_lines(self._proc.stderr, b"[codex] ")
 
     def _read_stdout(self) -> None:
+        try:
+            self._dispatch_stdout()
+        finally:
+            self._on_stdout_closed()
+
+    def _on_stdout_closed(self) -> None:
+        # stdout EOF means the process is gone: fail everything still waiting so
+        # waiters don't have to poll the process for liveness.
+        self._stdout_closed = True
+        while self._pending:
+            try:
+                _, reply = self._pending.popitem()
+            except KeyError:
+                break
+            reply.fail(RuntimeError("Codex MCP process exited"))
+        self._notify_session_waiters()
+
+    def _dispatch_stdout(self) -> None:
         assert self._proc.stdout is not None
         for line in self._proc.stdout:
+            if not _is_dispatchable_frame(line):
+                continue
             msg, err_code, _ = _try_parse_json(line)
             if err_code is not None or not msg:
                 continue
@@ -467,10 +1137,13 @@ class CodexMcpClient:
                     info = SessionInfo.from_session_configured_event(event)
                     if info is not None:
                         with self._session_cv:
-                            self._session_by_request_id[request_id] = info
-                            if len(self._session_by_request_id) > 2048:
-                                # Prevent unbounded growth on long-running bridges.
-                                self._session_by_request_id.clear()
+                            sessions = self._session_by_request_id
+                            sessions[request_id] = info
+                            sessions.move_to_end(request_id)
+                            # Prevent unbounded growth on long-running bridges by evicting
+                            # the oldest entries only; recent waiters keep their session.
+                            while len(sessions) > _SESSION_BY_REQUEST_ID_MAX:
+                                sessions.popitem(last=False)
                             self._session_cv.notify_all()
                         if self._on_session_configured is not None:
                             try:
@@ -482,10 +1155,9 @@ class CodexMcpClient:
             if "id" in msg:
                 msg_id = msg.get("id")
                 if isinstance(msg_id, int):
-                    with self._pending_lock:
-                        q = self._pending.pop(msg_id, None)
-                    if q is not None:
-                        q.put(msg)
+                    reply = self._pending.pop(msg_id, None)
+                    if reply is not None:
+                        reply.resolve(msg)
                 continue
 
     def _new_id(self) -> int:
@@ -495,14 +1167,20 @@ class CodexMcpClient:
             return rid
 
     def _send(self, msg: dict) -> None:
-        if not self._proc.stdin:
+        stdin = self._proc.stdin
+        if not stdin:
             raise RuntimeError("Codex MCP stdin is closed")
-        if self._proc.poll() is not None:
+        # The stdout reader flags process exit, so no waitpid() per message; a
+        # write racing the exit surfaces as a broken pipe instead.
+        if self._stdout_closed:
             raise RuntimeError("Codex MCP process has exited")
-        payload = _json_dumps(msg) + "\n"
+        payload = _json_dumpb_line(msg)
         with self._write_lock:
-            self._proc.stdin.write(payload)
-            self._proc.stdin.flush()
+            try:
+                stdin.write(payload)
+                stdin.flush()
+            except (BrokenPipeError, ValueError) as e:
+                raise RuntimeError("Codex MCP process has exited") from e
 
     def cancel_request(self, request_id: int) -> None:
         # Best-effort: Codex MCP server may ignore this.
@@ -514,30 +1192,36 @@ class CodexMcpClient:
     def _wait_for_response(
         self,
         request_id: int,
-        q: queue.Queue,
+        reply: _PendingReply,
         timeout_s: float,
         cancel_event: Optional[threading.Event],
     ) -> dict:
         deadline = time.monotonic() + timeout_s
-        while True:
-            if cancel_event is not None and cancel_event.is_set():
-                with self._pending_lock:
-                    self._pending.pop(request_id, None)
-                self.cancel_request(request_id)
-                raise CancelledError("Request cancelled")
-            if self._proc.poll() is not None:
-                with self._pending_lock:
-                    self._pending.pop(request_id, None)
-                raise RuntimeError("Codex MCP process exited")
-            remaining = deadline - time.monotonic()
-            if remaining <= 0:
-                with self._pending_lock:
-                    self._pending.pop(request_id, None)
-                raise TimeoutError(f"Timed out waiting for Codex MCP response to request {request_id}")
-            try:
-                return q.get(timeout=min(0.25, remaining))
-            except queue.Empty:
-                continue
+        # A CancelEvent wakes the reply slot directly; a plain Event has to be polled.
+        poll_s = _cancel_poll_interval(cancel_event)
+        on_cancel: Optional[Callable[[], None]] = None
+        if isinstance(cancel_event, CancelEvent):
+            on_cancel = lambda: reply.fail(CancelledError("Request cancelled"))  # noqa: E731
+            cancel_event.add_callback(on_cancel)
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise CancelledError("Request cancelled")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Timed out waiting for Codex MCP response to request {request_id}")
+                if reply.event.wait(remaining if poll_s is None else min(poll_s, remaining)):
+                    return reply.result()
+        except CancelledError:
+            self._pending.pop(request_id, None)
+            self.cancel_request(request_id)
+            raise
+        except BaseException:
+            self._pending.pop(request_id, None)
+            raise
+        finally:
+            if on_cancel is not None:
+                cancel_event.remove_callback(on_cancel)
 
     def _request(
         self,
@@ -546,13 +1230,8 @@ class CodexMcpClient:
         timeout_s: float = 120.0,
         cancel_event: Optional[threading.Event] = None,
     ) -> dict:
-        rid = self._new_id()
-        q: queue.Queue = queue.Queue(maxsize=1)
-        with self._pending_lock:
-            self._pending[rid] = q
-
-        self._send({"jsonrpc": "2.0", "id": rid, "method": method, "params": params or {}})
-        return self._wait_for_response(rid, q, timeout_s=timeout_s, cancel_event=cancel_event)
+        _, resp = self._request_with_id(method, params, timeout_s=timeout_s, cancel_event=cancel_event)
+        return resp
 
     def _request_with_id(
         self,
@@ -562,11 +1241,18 @@ class CodexMcpClient:
         cancel_event: Optional[threading.Event] = None,
     ) -> Tuple[int, dict]:
         rid = self._new_id()
-        q: queue.Queue = queue.Queue(maxsize=1)
-        with self._pending_lock:
-            self._pending[rid] = q
-        self._send({"jsonrpc": "2.0", "id": rid, "method": method, "params": params or {}})
-        resp = self._wait_for_response(rid, q, timeout_s=timeout_s, cancel_event=cancel_event)
+        reply = _PendingReply()
+        self._pending[rid] = reply
+        if self._stdout_closed:
+            # Lost the race with _on_stdout_closed draining _pending.
+            self._pending.pop(rid, None)
+            raise RuntimeError("Codex MCP process exited")
+        try:
+            self._send({"jsonrpc": "2.0", "id": rid, "method": method, "params": params or {}})
+        except Exception:
+            self._pending.pop(rid, None)
+            raise
+        resp = self._wait_for_response(rid, reply, timeout_s=timeout_s, cancel_event=cancel_event)
         return rid, resp
 
     def _initialize(self) -> None:
@@ -613,17 +1299,30 @@ class CodexMcpClient:
         self, request_id: int, timeout_s: float, cancel_event: Optional[threading.Event]
     ) -> Optional[SessionInfo]:
         deadline = time.monotonic() + timeout_s
+        poll_s = _cancel_poll_interval(cancel_event)
+        on_cancel: Optional[Callable[[], None]] = None
+        if isinstance(cancel_event, CancelEvent):
+            on_cancel = self._notify_session_waiters
+            cancel_event.add_callback(on_cancel)
+        try:
+            with self._session_cv:
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise CancelledError("Request cancelled")
+                    info = self._session_by_request_id.get(request_id)
+                    if info is not None:
+                        return info
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or self._stdout_closed:
+                        return None
+                    self._session_cv.wait(timeout=remaining if poll_s is None else min(poll_s, remaining))
+        finally:
+            if on_cancel is not None:
+                cancel_event.remove_callback(on_cancel)
+
+    def _notify_session_waiters(self) -> None:
         with self._session_cv:
-            while True:
-                if cancel_event is not None and cancel_event.is_set():
-                    raise CancelledError("Request cancelled")
-                info = self._session_by_request_id.get(request_id)
-                if info is not None:
-                    return info
-                remaining = deadline - time.monotonic()
-                if remaining <= 0:
-                    return None
-                self._session_cv.wait(timeout=min(0.25, remaining))
+            self._session_cv.notify_all()
 
 
 def _extract_text(result: dict) -> str:
@@ -631,6 +1330,13 @@ def _extract_text(result: dict) -> str:
         return _json_dumps(result)
     content = result.get("content")
     if isinstance(content, list):
+        # Common case: upstream replies with exactly one text part.
+        if len(content) == 1:
+            item = content[0]
+            if isinstance(item, dict) and item.get("type") == "text":
+                text = item.get("text")
+                if isinstance(text, str):
+                    return text
         parts = []
         for item in content:
             if isinstance(item, dict) and item.get("type") == "text":
@@ -648,20 +1354,7 @@ def _extract_text(result: dict) -> str:
 
 
 def _session_info_payload(info: SessionInfo) -> dict:
-    return {
-        "conversationId": info.conversation_id,
-        "name": info.name,
-        "capturedAt": info.captured_at,
-        "model": info.model,
-        "modelProviderId": info.model_provider_id,
-        "approvalPolicy": info.approval_policy,
-        "sandboxPolicy": info.sandbox_policy,
-        "cwd": info.cwd,
-        "reasoningEffort": info.reasoning_effort,
-        "rolloutPath": info.rollout_path,
-        "historyLogId": info.history_log_id,
-        "historyEntryCount": info.history_entry_count,
-    }
+    return info.payload
 
 
 def _get_state_dir() -> Path:
@@ -676,7 +1369,21 @@ def _run_cmd(argv: List[str], timeout_s: float) -> Tuple[int, str, str]:
     return proc.returncode, proc.stdout, proc.stderr
 
 
+# (binary path, binary mtime_ns) -> `codex --version` output.
+_codex_version_cache: Dict[Tuple[str, int], str] = {}
+
+
 def _get_codex_version(codex_binary: str) -> Optional[str]:
+    # Spawning `codex --version` costs a fork/exec; reuse the answer until the
+    # binary on disk changes (e.g. an upgrade replaces it).
+    try:
+        key: Optional[Tuple[str, int]] = (codex_binary, os.stat(codex_binary).st_mtime_ns)
+    except OSError:
+        key = None
+    if key is not None:
+        cached = _codex_version_cache.get(key)
+        if cached is not None:
+            return cached
     try:
         code, out, _ = _run_cmd([codex_binary, "--version"], timeout_s=5.0)
     except (OSError, subprocess.TimeoutExpired):
@@ -684,11 +1391,45 @@ def _get_codex_version(codex_binary: str) -> Optional[str]:
     if code != 0:
         return None
     v = out.strip()
+    if v and key is not None:
+        _codex_version_cache[key] = v
     return v or None
 
 
+# (binary path, binary mtime_ns, codex version, state dir) -> (generated schema
+# path or None on failure, time.monotonic() of the attempt).
+_schema_path_cache: Dict[Tuple[str, int, str, str], Tuple[Optional[Path], float]] = {}
+# A failed generation (e.g. a CLI without `app-server generate-json-schema`) is
+# not retried on every options request, but a transient one does not stick.
+_SCHEMA_FAILURE_RETRY_S = 300.0
+
+
 def _ensure_schema_cache(codex_binary: str, state_dir: Path) -> Optional[Path]:
-    version = _get_codex_version(codex_binary) or "unknown"
+    version = _get_codex_version(codex_binary)
+    try:
+        mtime_ns = os.stat(codex_binary).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    key = None
+    if version is not None and mtime_ns is not None:
+        # Replacing the binary changes its mtime and so drops every entry for it.
+        key = (codex_binary, mtime_ns, version, str(state_dir))
+        cached = _schema_path_cache.get(key)
+        if cached is not None:
+            path, attempted_at = cached
+            if path is None:
+                if time.monotonic() - attempted_at < _SCHEMA_FAILURE_RETRY_S:
+                    return None
+            elif path.exists():
+                # A schema file removed from under us falls through and is regenerated.
+                return path
+    schema_path = _generate_schema_cache(codex_binary, state_dir, version or "unknown")
+    if key is not None:
+        _schema_path_cache[key] = (schema_path, time.monotonic())
+    return schema_path
+
+
+def _generate_schema_cache(codex_binary: str, state_dir: Path, version: str) -> Optional[Path]:
     cache_dir = state_dir / "schema-cache" / version.replace(os.sep, "_")
     schema_path = cache_dir / "codex_app_server_protocol.schemas.json"
     if schema_path.exists():
@@ -712,9 +1453,26 @@ def _ensure_schema_cache(codex_binary: str, state_dir: Path) -> Optional[Path]:
     return None
 
 
+# (schema path, schema mtime_ns) -> enums extracted from it.
+_schema_enums_cache: Dict[Tuple[str, int], dict] = {}
+
+
 def _extract_enums_from_schema(schema_path: Path) -> dict:
+    # The generated schema is large and only three enums are needed; parse it
+    # once per file version rather than on every options/resources request.
     try:
-        schema = json.loads(schema_path.read_text(encoding="utf-8"))
+        key = (str(schema_path), schema_path.stat().st_mtime_ns)
+    except OSError:
+        return {}
+    cached = _schema_enums_cache.get(key)
+    if cached is None:
+        cached = _schema_enums_cache[key] = _parse_schema_enums(schema_path)
+    return dict(cached)
+
+
+def _parse_schema_enums(schema_path: Path) -> dict:
+    try:
+        schema = _json_loads(schema_path.read_bytes())
     except Exception:
         return {}
     defs = schema.get("definitions")
@@ -741,13 +1499,8 @@ def _extract_enums_from_schema(schema_path: Path) -> dict:
                 enum_vals = item.get("enum")
                 if isinstance(enum_vals, list) and all(isinstance(x, str) for x in enum_vals):
                     vals_out.extend(enum_vals)
-        dedup: List[str] = []
-        seen = set()
-        for v in vals_out:
-            if v not in seen:
-                seen.add(v)
-                dedup.append(v)
-        return dedup
+        # Order-preserving dedup.
+        return list(dict.fromkeys(vals_out))
 
     return {
         "reasoningEffort": _enum_for("ReasoningEffort"),
@@ -764,14 +1517,9 @@ def _detect_auth_mode(sessions: SessionStore) -> str:
     """
     # Check if we've successfully used any API-only models
     api_only_models = {"gpt-5.2-mini", "gpt-5.2-nano", "o3", "o4-mini"}
-    try:
-        with sessions._lock:
-            for info in sessions._by_id.values():
-                if info.model in api_only_models:
-                    # If we have a session with an API-only model, user has API auth
-                    return "api"
-    except Exception:
-        pass
+    # If we have a session with an API-only model, user has API auth
+    if not api_only_models.isdisjoint(sessions.models()):
+        return "api"
     # Default to ChatGPT since it's more common and restrictive
     return "chatgpt"
 
@@ -796,15 +1544,8 @@ def _discover_gpt52_models(codex_binary: str, sessions: SessionStore) -> dict:
 
     # Also include anything we have actually seen work in session_configured events
     seen = set(available)
-    try:
-        with sessions._lock:
-            for info in sessions._by_id.values():
-                if info.model and info.model not in seen:
-                    # Only add models that have successfully been used
-                    seen.add(info.model)
-                    available.append(info.model)
-    except Exception:
-        pass
+    # Only add models that have successfully been used
+    available.extend(model for model in sessions.models() if model not in seen)
 
     return {
         "authMode": auth_mode,
@@ -845,181 +1586,272 @@ def _normalize_upstream_tool_response(resp: dict) -> Tuple[str, bool]:
         return _json_dumps(resp), True
 
     if "error" in resp:
-        err = resp.get("error")
+        err = resp["error"]
         if isinstance(err, dict):
-            msg = err.get("message") if isinstance(err.get("message"), str) else _json_dumps(err)
-            return msg, True
+            msg = err.get("message")
+            return (msg if isinstance(msg, str) else _json_dumps(err)), True
         if isinstance(err, str):
             return err, True
         return _json_dumps(err), True
 
     result = resp.get("result")
     if isinstance(result, dict):
-        is_error = bool(result.get("isError") is True)
-        if isinstance(result.get("error"), str):
-            is_error = True
+        is_error = result.get("isError") is True or isinstance(result.get("error"), str)
         return _extract_text(result), is_error
 
     return _json_dumps(resp), True
 
 
-def _bridge_tools() -> list:
-    # Static fallback schema; prefer dynamic passthrough from upstream in tools/list.
-    return [
-        {
-            "name": "codex",
-            "description": (
-                "Run a Codex session and return JSON {conversationId, output, session}.\n\n"
-                "**Automatic Model Selection:**\n"
-                "- taskType='coding' (default) -> gpt-5.2-codex\n"
-                "- taskType='discussion' or 'research' -> gpt-5.2\n"
-                "- Invalid models fall back to task-appropriate default\n"
-                "- reasoningEffort defaults to 'xhigh'"
-            ),
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "prompt": {"type": "string", "description": "The *initial user prompt* to start the Codex conversation."},
-                    "taskType": {
-                        "type": "string",
-                        "enum": ["coding", "discussion", "research"],
-                        "description": "Task type for automatic model selection. Defaults to 'coding'.",
-                    },
-                    "model": {"type": "string", "description": "Optional override for the model name (e.g. \"gpt-5.2\", \"o3\"). Validated against available models."},
-                    "profile": {"type": "string", "description": "Optional Codex config profile name."},
-                    "cwd": {"type": "string", "description": "Optional working directory."},
-                    "sandbox": {"type": "string", "description": "Sandbox mode."},
-                    "approval-policy": {"type": "string", "description": "Approval policy."},
-                    "config": {
-                        "type": "object",
-                        "description": "Config overrides (mapped to Codex CLI -c values).",
-                        "additionalProperties": True,
-                    },
-                    "base-instructions": {"type": "string", "description": "Optional base instructions for Codex."},
-                    "developer-instructions": {
-                        "type": "string",
-                        "description": "Optional developer instructions for Codex.",
-                    },
-                    "compact-prompt": {"type": "string", "description": "Prompt used when Codex compacts the conversation."},
-                    "reasoningEffort": {
-                        "type": "string",
-                        "description": "Optional convenience override mapped to config.model_reasoning_effort.",
-                    },
-                    "reasoningSummary": {
-                        "type": "string",
-                        "description": "Optional convenience override mapped to config.model_reasoning_summary.",
-                    },
-                    "timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."},
-                    "startupTimeoutMs": {
-                        "type": "integer",
-                        "description": "How long to wait for conversationId/session metadata after tool completion.",
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "Optional name/topic for this session (e.g., 'auth-security-review'). Makes it easier to find and reference later.",
-                    },
+# Static fallback schema; prefer dynamic passthrough from upstream in tools/list.
+# Built once at import and shared by every tools/list response: treat as read-only.
+_BRIDGE_TOOLS: Tuple[dict, ...] = (
+    {
+        "name": "codex",
+        "description": (
+            "Run a Codex session and return JSON {conversationId, output, session}.\n\n"
+            "**Automatic Model Selection:**\n"
+            "- taskType='coding' (default) -> gpt-5.2-codex\n"
+            "- taskType='discussion' or 'research' -> gpt-5.2\n"
+            "- Invalid models fall back to task-appropriate default\n"
+            "- reasoningEffort defaults to 'xhigh'"
+        ),
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "prompt": {"type": "string", "description": "The *initial user prompt* to start the Codex conversation."},
+                "taskType": {
+                    "type": "string",
+                    "enum": ["coding", "discussion", "research"],
+                    "description": "Task type for automatic model selection. Defaults to 'coding'.",
+                },
+                "model": {"type": "string", "description": "Optional override for the model name (e.g. \"gpt-5.2\", \"o3\"). Validated against available models."},
+                "profile": {"type": "string", "description": "Optional Codex config profile name."},
+                "cwd": {"type": "string", "description": "Optional working directory."},
+                "sandbox": {"type": "string", "description": "Sandbox mode."},
+                "approval-policy": {"type": "string", "description": "Approval policy."},
+                "config": {
+                    "type": "object",
+                    "description": "Config overrides (mapped to Codex CLI -c values).",
+                    "additionalProperties": True,
+                },
+                "base-instructions": {"type": "string", "description": "Optional base instructions for Codex."},
+                "developer-instructions": {
+                    "type": "string",
+                    "description": "Optional developer instructions for Codex.",
+                },
+                "compact-prompt": {"type": "string", "description": "Prompt used when Codex compacts the conversation."},
+                "reasoningEffort": {
+                    "type": "string",
+                    "description": "Optional convenience override mapped to config.model_reasoning_effort.",
+                },
+                "reasoningSummary": {
+                    "type": "string",
+                    "description": "Optional convenience override mapped to config.model_reasoning_summary.",
+                },
+                "timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."},
+                "startupTimeoutMs": {
+                    "type": "integer",
+                    "description": "How long to wait for conversationId/session metadata after tool completion.",
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Optional name/topic for this session (e.g., 'auth-security-review'). Makes it easier to find and reference later.",
                 },
-                "required": ["prompt"],
             },
+            "required": ["prompt"],
         },
-        {
-            "name": "codex-reply",
-            "description": "Continue a Codex conversation. Returns JSON {conversationId, output, session?}.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "conversationId": {"type": "string", "description": "Conversation/session id returned by codex."},
-                    "prompt": {"type": "string", "description": "Next user prompt."},
-                    "timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."},
-                },
-                "required": ["conversationId", "prompt"],
+    },
+    {
+        "name": "codex-reply",
+        "description": "Continue a Codex conversation. Returns JSON {conversationId, output, session?}.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "conversationId": {"type": "string", "description": "Conversation/session id returned by codex."},
+                "prompt": {"type": "string", "description": "Next user prompt."},
+                "timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."},
             },
+            "required": ["conversationId", "prompt"],
         },
-    ]
-
-
-def _bridge_extra_tools() -> list:
-    return [
-        {
-            "name": "codex-bridge-info",
-            "description": "Get Codex Bridge info (versions, paths, state). Returns JSON.",
-            "inputSchema": {"type": "object", "properties": {}},
+    },
+)
+
+
+def _bridge_tools() -> Tuple[dict, ...]:
+    return _BRIDGE_TOOLS
+
+
+# Bridge-only tools appended to tools/list; shared and read-only like _BRIDGE_TOOLS.
+_BRIDGE_EXTRA_TOOLS: Tuple[dict, ...] = (
+    {
+        "name": "codex-bridge-info",
+        "description": "Get Codex Bridge info (versions, paths, state). Returns JSON.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "codex-bridge-options",
+        "description": "List common options (models, reasoning enums, sandbox/approval). Returns JSON.",
+        "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "codex-bridge-sessions",
+        "description": "List known Codex conversations captured by the bridge. Returns JSON {data,nextCursor}. Use 'query' to search by session name.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "limit": {"type": "integer", "description": "Max items to return (default 50)."},
+                "cursor": {"type": "string", "description": "Pagination cursor from a previous call."},
+                "query": {"type": "string", "description": "Search sessions by name (case-insensitive substring match)."},
+            },
         },
-        {
-            "name": "codex-bridge-options",
-            "description": "List common options (models, reasoning enums, sandbox/approval). Returns JSON.",
-            "inputSchema": {"type": "object", "properties": {}},
+    },
+    {
+        "name": "codex-bridge-session",
+        "description": "Get metadata for a single conversationId. Returns JSON or null.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {"conversationId": {"type": "string"}},
+            "required": ["conversationId"],
         },
-        {
-            "name": "codex-bridge-sessions",
-            "description": "List known Codex conversations captured by the bridge. Returns JSON {data,nextCursor}. Use 'query' to search by session name.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "limit": {"type": "integer", "description": "Max items to return (default 50)."},
-                    "cursor": {"type": "string", "description": "Pagination cursor from a previous call."},
-                    "query": {"type": "string", "description": "Search sessions by name (case-insensitive substring match)."},
-                },
+    },
+    {
+        "name": "codex-bridge-name-session",
+        "description": "Set or update the name/topic of a Codex session for easier reference. Returns the updated session info.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "conversationId": {"type": "string", "description": "The conversation ID to name."},
+                "name": {"type": "string", "description": "The name/topic to assign to this session (e.g., 'auth-security-review')."},
             },
+            "required": ["conversationId", "name"],
         },
-        {
-            "name": "codex-bridge-session",
-            "description": "Get metadata for a single conversationId. Returns JSON or null.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {"conversationId": {"type": "string"}},
-                "required": ["conversationId"],
+    },
+    {
+        "name": "codex-bridge-delete-session",
+        "description": "Delete a session from the bridge's session index. Optionally delete the underlying Codex rollout file. Useful for cleaning up failed/test sessions.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "conversationId": {"type": "string", "description": "The conversation ID to delete."},
+                "deleteRollout": {"type": "boolean", "description": "If true, also delete the underlying Codex rollout file. Default: false."},
             },
+            "required": ["conversationId"],
         },
-        {
-            "name": "codex-bridge-name-session",
-            "description": "Set or update the name/topic of a Codex session for easier reference. Returns the updated session info.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "conversationId": {"type": "string", "description": "The conversation ID to name."},
-                    "name": {"type": "string", "description": "The name/topic to assign to this session (e.g., 'auth-security-review')."},
+    },
+    {
+        "name": "codex-bridge-export-session",
+        "description": "Export a session's conversation as formatted markdown. Useful for documentation and sharing.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "conversationId": {"type": "string", "description": "The conversation ID to export."},
+                "format": {"type": "string", "enum": ["markdown", "json"], "description": "Export format. Default: markdown."},
+                "maxMessages": {
+                    "type": "integer",
+                    "description": "Stop after this many messages (default 5000, max 50000).",
                 },
-                "required": ["conversationId", "name"],
             },
+            "required": ["conversationId"],
         },
-        {
-            "name": "codex-bridge-delete-session",
-            "description": "Delete a session from the bridge's session index. Optionally delete the underlying Codex rollout file. Useful for cleaning up failed/test sessions.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "conversationId": {"type": "string", "description": "The conversation ID to delete."},
-                    "deleteRollout": {"type": "boolean", "description": "If true, also delete the underlying Codex rollout file. Default: false."},
+    },
+    {
+        "name": "codex-bridge-read-rollout",
+        "description": "Read the last N lines from a session's Codex rollout log file. Useful for debugging session history.",
+        "inputSchema": {
+            "type": "object",
+            "properties": {
+                "conversationId": {"type": "string", "description": "The conversation ID to read rollout for."},
+                "lines": {"type": "integer", "description": "Number of lines to read from the end (default 50, max 500)."},
+                "countLines": {
+                    "type": "boolean",
+                    "description": (
+                        "Report totalLines (default true). Counting reads the whole file; "
+                        "pass false to read only the tail (totalLines is then null)."
+                    ),
                 },
-                "required": ["conversationId"],
             },
+            "required": ["conversationId"],
         },
+    },
+)
+
+
+def _bridge_extra_tools() -> Tuple[dict, ...]:
+    return _BRIDGE_EXTRA_TOOLS
+
+
+# Bridge description and extra arguments layered onto upstream tool schemas by
+# tools/list; properties upstream already defines are left alone.
+_UPSTREAM_TOOL_PATCHES: Dict[str, Tuple[str, Dict[str, dict]]] = {
+    "codex": (
+        "Run a Codex session and return JSON {conversationId, output, session}.",
         {
-            "name": "codex-bridge-export-session",
-            "description": "Export a session's conversation as formatted markdown. Useful for documentation and sharing.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "conversationId": {"type": "string", "description": "The conversation ID to export."},
-                    "format": {"type": "string", "enum": ["markdown", "json"], "description": "Export format. Default: markdown."},
-                },
-                "required": ["conversationId"],
+            "reasoningEffort": {
+                "type": "string",
+                "description": "Optional convenience override mapped to config.model_reasoning_effort.",
+            },
+            "reasoningSummary": {
+                "type": "string",
+                "description": "Optional convenience override mapped to config.model_reasoning_summary.",
+            },
+            "timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."},
+            "startupTimeoutMs": {
+                "type": "integer",
+                "description": "How long to wait for conversationId/session metadata after tool completion.",
+            },
+            "name": {
+                "type": "string",
+                "description": "Optional name/topic for this session (e.g., 'auth-security-review'). Makes it easier to find and reference later.",
             },
         },
+    ),
+    "codex-reply": (
+        "Continue a Codex conversation. Returns JSON {conversationId, output, session?}.",
+        {"timeoutMs": {"type": "integer", "description": "Overall tool timeout in milliseconds."}},
+    ),
+}
+
+
+# Results for the fixed-shape MCP methods, built once and shared by every
+# response (read-only, like the tool schemas above).
+_SERVER_CAPABILITIES = {
+    "tools": {"listChanged": False},
+    "resources": {"subscribe": False, "listChanged": False},
+    "prompts": {"listChanged": False},
+}
+_SERVER_INFO = {"name": "codex-bridge", "title": "Codex Bridge", "version": BRIDGE_VERSION}
+_PROMPTS_LIST_RESULT = {"prompts": []}
+_RESOURCES_LIST_RESULT = {
+    "resources": [
         {
-            "name": "codex-bridge-read-rollout",
-            "description": "Read the last N lines from a session's Codex rollout log file. Useful for debugging session history.",
-            "inputSchema": {
-                "type": "object",
-                "properties": {
-                    "conversationId": {"type": "string", "description": "The conversation ID to read rollout for."},
-                    "lines": {"type": "integer", "description": "Number of lines to read from the end (default 50, max 500)."},
-                },
-                "required": ["conversationId"],
-            },
+            "uri": "codex-bridge://info",
+            "name": "Codex Bridge Info",
+            "mimeType": "application/json",
+            "description": "Bridge versions and state.",
+        },
+        {
+            "uri": "codex-bridge://options",
+            "name": "Codex Bridge Options",
+            "mimeType": "application/json",
+            "description": "Common models/enums/options.",
         },
+        {
+            "uri": "codex-bridge://sessions",
+            "name": "Codex Bridge Sessions",
+            "mimeType": "application/json",
+            "description": "Known conversations captured by the bridge.",
+        },
+    ]
+}
+_RESOURCE_TEMPLATES_LIST_RESULT = {
+    "resourceTemplates": [
+        {
+            "uriTemplate": "codex-bridge://session/{conversationId}",
+            "name": "Session by conversationId",
+            "description": "Session metadata captured by the bridge.",
+        }
     ]
+}
 
 
 @dataclass
@@ -1028,17 +1860,72 @@ class InflightRequest:
     upstream_request_id: Optional[int] = None
 
 
+def _options_static_payload(schema_path: Optional[Path]) -> dict:
+    """Static part of the codex-bridge-options payload; "models" is filled per call."""
+    enums = _extract_enums_from_schema(schema_path) if schema_path is not None else {}
+    if not enums.get("reasoningEffort"):
+        enums["reasoningEffort"] = ["none", "minimal", "low", "medium", "high", "xhigh"]
+    if not enums.get("reasoningSummary"):
+        enums["reasoningSummary"] = ["auto", "concise", "detailed", "none"]
+    return {
+        "sandboxModes": ["read-only", "workspace-write", "danger-full-access"],
+        "approvalPolicies": ["untrusted", "on-failure", "on-request", "never"],
+        "reasoningEffortValues": enums.get("reasoningEffort"),
+        "reasoningSummaryValues": enums.get("reasoningSummary"),
+        "networkAccessValues": enums.get("networkAccess") or ["restricted", "enabled"],
+        "models": None,
+        "configKeys": {
+            "reasoningEffort": "model_reasoning_effort",
+            "reasoningSummary": "model_reasoning_summary",
+        },
+        "defaults": {
+            "reasoningEffort": DEFAULT_REASONING_EFFORT,
+            "sandbox": DEFAULT_SANDBOX,
+            "taskTypes": TASK_TYPES,
+            "taskModelDefaults": TASK_MODEL_DEFAULTS,
+            "defaultTaskType": DEFAULT_TASK_TYPE,
+        },
+    }
+
+
+def _json_resource_result(uri: str, payload: Any) -> dict:
+    return _json_text_resource_result(uri, _json_dumps(payload))
+
+
+def _json_text_resource_result(uri: str, text: str) -> dict:
+    return {"contents": [{"uri": uri, "mimeType": "application/json", "text": text}]}
+
+
+def _stdout_fileno() -> Optional[int]:
+    """Return the fd behind sys.stdout, or None when it is not a real file.
+
+    The fd is switched to blocking mode if a parent handed it over non-blocking,
+    so _send's os.write never fails with EAGAIN when the client reads slowly.
+    """
+    try:
+        sys.stdout.flush()
+        fd = sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        return None
+    try:
+        if not os.get_blocking(fd):
+            os.set_blocking(fd, True)
+    except (AttributeError, OSError):
+        pass
+    return fd
+
+
 class CodexBridgeServer:
     def __init__(self) -> None:
         self._client: Optional[CodexMcpClient] = None
         self._codex_binary: Optional[str] = None
         self._codex_binary_error: Optional[str] = None
+        self._state_dir = _get_state_dir()
         try:
-            self._codex_binary = _find_codex_binary()
+            self._codex_binary = _find_codex_binary(self._state_dir)
         except Exception as e:
             self._codex_binary_error = str(e)
 
-        self._state_dir = _get_state_dir()
         self._sessions = SessionStore(self._state_dir)
         self._should_exit = threading.Event()
         self._session_queue: queue.Queue = queue.Queue(maxsize=2048)
@@ -1046,14 +1933,85 @@ class CodexBridgeServer:
         self._session_writer_thread.start()
 
         self._write_lock = threading.Lock()
+        self._stdout_fd = _stdout_fileno()
+        # Frames waiting for whichever _send holds _write_lock to flush them.
+        self._out_frames: deque = deque()
+        # Single get/pop calls on _inflight are atomic under the GIL; the lock only
+        # guards the check-then-insert sequence in tools/call.
         self._inflight_lock = threading.Lock()
         self._inflight: Dict[Any, InflightRequest] = {}
+        self._tool_pool = ThreadPoolExecutor(max_workers=_TOOL_CALL_WORKERS, thread_name_prefix="codex-bridge-tool")
+        self._local_tool_pool = ThreadPoolExecutor(
+            max_workers=_LOCAL_TOOL_CALL_WORKERS, thread_name_prefix="codex-bridge-local-tool"
+        )
 
-        self._tools_cache: Optional[list] = None
+        # tools/list result ({"tools": [...]}), built once per server.
+        self._tools_cache: Optional[dict] = None
         self._tools_cache_lock = threading.Lock()
 
+        # Method dispatch. Request handlers only run when the message carries an id;
+        # notification handlers run either way.
+        self._request_handlers: Dict[str, Callable[[dict, Any], Any]] = {
+            "initialize": self._on_initialize,
+            "shutdown": self._on_shutdown,
+            "tools/list": self._on_tools_list,
+            "tools/call": self._on_tools_call,
+            "prompts/list": self._on_prompts_list,
+            "resources/list": self._on_resources_list,
+            "resources/read": self._on_resources_read,
+            "resources/templates/list": self._on_resource_templates_list,
+        }
+        self._notification_handlers: Dict[str, Callable[[dict, Any], Any]] = {
+            "exit": self._on_exit,
+            "$/cancelRequest": self._on_cancel_request,
+        }
+        # tools/call dispatch; every entry takes (msg_id, args, inflight).
+        self._tool_handlers: Dict[str, Callable[[Any, dict, InflightRequest], dict]] = {
+            "codex": self._handle_codex_tool,
+            "codex-reply": self._handle_codex_reply_tool,
+            "codex-bridge-info": lambda msg_id, args, inflight: self._handle_bridge_info_tool(msg_id),
+            "codex-bridge-options": lambda msg_id, args, inflight: self._handle_bridge_options_tool(msg_id),
+            "codex-bridge-sessions": lambda msg_id, args, inflight: self._handle_sessions_list_tool(msg_id, args),
+            "codex-bridge-session": lambda msg_id, args, inflight: self._handle_session_get_tool(msg_id, args),
+            "codex-bridge-name-session": lambda msg_id, args, inflight: self._handle_name_session_tool(msg_id, args),
+            "codex-bridge-delete-session": lambda msg_id, args, inflight: self._handle_delete_session_tool(
+                msg_id, args
+            ),
+            "codex-bridge-read-rollout": lambda msg_id, args, inflight: self._handle_read_rollout_tool(msg_id, args),
+            "codex-bridge-export-session": lambda msg_id, args, inflight: self._handle_export_session_tool(
+                msg_id, args
+            ),
+        }
+
+        # codex-bridge-options payload minus "models", keyed by the schema file it
+        # was built from (the schema cache dir is per Codex version).
+        self._options_cache: Optional[Tuple[Optional[Path], dict]] = None
+        self._options_cache_lock = threading.Lock()
+        # Serialized options payload: (schema path, models dict it was built with, JSON).
+        self._options_text_cache: Optional[Tuple[Optional[Path], Optional[dict], str]] = None
+        # _discover_gpt52_models() result, keyed by SessionStore.membership_version:
+        # it depends only on which sessions (and so which models) are known.
+        self._models_cache: Optional[Tuple[int, dict]] = None
+        # Serialized codex-bridge://sessions resource, keyed by SessionStore.version.
+        self._sessions_resource_cache: Optional[Tuple[int, str]] = None
+
+    def _models_info(self) -> dict:
+        """Cached _discover_gpt52_models() for the current session set; treat as read-only."""
+        version = self._sessions.membership_version
+        cached = self._models_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        # Read the version first: a session added mid-scan only forces one extra rebuild.
+        models = _discover_gpt52_models(self._codex_binary or "", self._sessions)
+        self._models_cache = (version, models)
+        return models
+
     def _get_client(self) -> CodexMcpClient:
         if self._client is None or not self._client.is_alive():
+            # Calls still queued when close() ran must not respawn Codex: nothing
+            # would ever close the new process.
+            if self._should_exit.is_set():
+                raise RuntimeError("Bridge is shutting down")
             if self._client is not None:
                 self._client.close()
             if not self._codex_binary:
@@ -1068,34 +2026,62 @@ class CodexBridgeServer:
             pass
 
     def _session_writer(self) -> None:
-        while not self._should_exit.is_set():
-            try:
-                info = self._session_queue.get(timeout=0.5)
-            except queue.Empty:
-                continue
+        # Parks on the queue until work arrives; close() enqueues _SESSION_WRITER_STOP.
+        while True:
+            batch = [self._session_queue.get()]
+            # Drain whatever else is queued so a burst costs one lock + one write.
+            while True:
+                try:
+                    batch.append(self._session_queue.get_nowait())
+                except queue.Empty:
+                    break
             try:
-                if isinstance(info, SessionInfo):
-                    self._sessions.add(info)
+                self._sessions.add_many(i for i in batch if isinstance(i, SessionInfo))
             except Exception:
                 pass
+            if any(i is _SESSION_WRITER_STOP for i in batch):
+                return
 
     def _send(self, msg: dict) -> None:
-        payload = _json_dumps(msg) + "\n"
+        # Serialize straight to UTF-8 bytes outside the lock, then queue the frame.
+        # Whoever holds the lock writes every queued frame in one write, so workers
+        # finishing together share a syscall; ours is on the wire when we return.
+        self._out_frames.append(_json_dumpb_line(msg))
         with self._write_lock:
-            sys.stdout.write(payload)
-            sys.stdout.flush()
+            frames = self._out_frames
+            if not frames:
+                return
+            batch = [frames.popleft() for _ in range(len(frames))]
+            payload = batch[0] if len(batch) == 1 else b"".join(batch)
+            fd = self._stdout_fd
+            if fd is None:
+                out = sys.stdout.buffer
+                out.write(payload)
+                out.flush()
+                return
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
 
     def _tools_list(self) -> list:
+        return self._tools_list_result()["tools"]
+
+    def _tools_list_result(self) -> dict:
+        cached = self._tools_cache
+        if cached is not None:
+            return cached
         with self._tools_cache_lock:
-            if self._tools_cache is not None:
-                return self._tools_cache
+            if self._tools_cache is None:
+                self._tools_cache = {"tools": self._build_tools_list()}
+            return self._tools_cache
 
+    def _build_tools_list(self) -> list:
         base_tools: list = []
         try:
             client = self._get_client()
             base_tools = client.list_tools(timeout_s=3.0)
         except Exception:
-            base_tools = _bridge_tools()
+            base_tools = list(_bridge_tools())
 
         # Patch tool descriptions (input schemas come from upstream when possible).
         patched: list = []
@@ -1103,65 +2089,20 @@ class CodexBridgeServer:
             if not isinstance(tool, dict):
                 continue
             name = tool.get("name")
-            if name == "codex":
-                tool = dict(tool)
-                tool["description"] = "Run a Codex session and return JSON {conversationId, output, session}."
-                schema = tool.get("inputSchema")
-                if isinstance(schema, dict):
-                    schema = dict(schema)
-                    props = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
-                    props = dict(props)
-                    props.setdefault(
-                        "reasoningEffort",
-                        {
-                            "type": "string",
-                            "description": "Optional convenience override mapped to config.model_reasoning_effort.",
-                        },
-                    )
-                    props.setdefault(
-                        "reasoningSummary",
-                        {
-                            "type": "string",
-                            "description": "Optional convenience override mapped to config.model_reasoning_summary.",
-                        },
-                    )
-                    props.setdefault(
-                        "timeoutMs", {"type": "integer", "description": "Overall tool timeout in milliseconds."}
-                    )
-                    props.setdefault(
-                        "startupTimeoutMs",
-                        {
-                            "type": "integer",
-                            "description": "How long to wait for conversationId/session metadata after tool completion.",
-                        },
-                    )
-                    props.setdefault(
-                        "name",
-                        {
-                            "type": "string",
-                            "description": "Optional name/topic for this session (e.g., 'auth-security-review'). Makes it easier to find and reference later.",
-                        },
-                    )
-                    schema["properties"] = props
-                    tool["inputSchema"] = schema
-            elif name == "codex-reply":
-                tool = dict(tool)
-                tool["description"] = "Continue a Codex conversation. Returns JSON {conversationId, output, session?}."
+            tool_patch = _UPSTREAM_TOOL_PATCHES.get(name) if isinstance(name, str) else None
+            if tool_patch is not None:
+                description, extra_props = tool_patch
+                tool = {**tool, "description": description}
                 schema = tool.get("inputSchema")
                 if isinstance(schema, dict):
-                    schema = dict(schema)
-                    props = schema.get("properties") if isinstance(schema.get("properties"), dict) else {}
-                    props = dict(props)
-                    props.setdefault(
-                        "timeoutMs", {"type": "integer", "description": "Overall tool timeout in milliseconds."}
-                    )
-                    schema["properties"] = props
-                    tool["inputSchema"] = schema
+                    props = schema.get("properties")
+                    props = dict(props) if isinstance(props, dict) else {}
+                    for key, prop in extra_props.items():
+                        props.setdefault(key, prop)
+                    tool["inputSchema"] = {**schema, "properties": props}
             patched.append(tool)
 
         patched.extend(_bridge_extra_tools())
-        with self._tools_cache_lock:
-            self._tools_cache = patched
         return patched
 
     def _handle_codex_tool(
@@ -1178,7 +2119,7 @@ class CodexBridgeServer:
         task_type = args.pop("taskType", None)  # Bridge-specific: for automatic model selection
 
         # Resolve model based on task type and availability
-        models_info = _discover_gpt52_models(self._codex_binary or "", self._sessions)
+        models_info = self._models_info()
         available = models_info.get("available", API_AUTH_MODELS)
         requested_model = args.get("model")
         resolved_model, model_warning = _resolve_model(requested_model, task_type, available)
@@ -1195,20 +2136,17 @@ class CodexBridgeServer:
         if isinstance(startup_timeout_ms, int) and startup_timeout_ms > 0:
             startup_timeout_s = max(0.1, min(60.0, startup_timeout_ms / 1000.0))
 
-        if isinstance(reasoning_effort, str) and reasoning_effort:
-            cfg = args.get("config")
-            if not isinstance(cfg, dict):
-                cfg = {}
-            cfg = dict(cfg)
-            cfg["model_reasoning_effort"] = reasoning_effort
-            args["config"] = cfg
-        if isinstance(reasoning_summary, str) and reasoning_summary:
+        effort = reasoning_effort if isinstance(reasoning_effort, str) else None
+        summary = reasoning_summary if isinstance(reasoning_summary, str) else None
+        if effort or summary:
+            # args is this request's own parsed JSON, so its config is updated in place.
             cfg = args.get("config")
             if not isinstance(cfg, dict):
-                cfg = {}
-            cfg = dict(cfg)
-            cfg["model_reasoning_summary"] = reasoning_summary
-            args["config"] = cfg
+                cfg = args["config"] = {}
+            if effort:
+                cfg["model_reasoning_effort"] = effort
+            if summary:
+                cfg["model_reasoning_summary"] = summary
 
         # Default sandbox to danger-full-access if not specified
         if not args.get("sandbox"):
@@ -1251,10 +2189,7 @@ class CodexBridgeServer:
         conversation_id = args.get("conversationId")
         prompt = args.get("prompt")
         if not isinstance(conversation_id, str) or not isinstance(prompt, str):
-            return _jsonrpc_response(
-                msg_id,
-                _tool_text_result("codex-reply requires {conversationId: string, prompt: string}", is_error=True),
-            )
+            return _tool_error(msg_id, "codex-reply requires {conversationId: string, prompt: string}")
 
         timeout_ms = args.get("timeoutMs")
         timeout_s = 600.0
@@ -1297,7 +2232,7 @@ class CodexBridgeServer:
     def _handle_delete_session_tool(self, msg_id: Any, args: dict) -> dict:
         cid = args.get("conversationId")
         if not isinstance(cid, str) or not cid:
-            return _jsonrpc_response(msg_id, _tool_text_result("conversationId is required", is_error=True))
+            return _tool_error(msg_id, "conversationId is required")
 
         delete_rollout = args.get("deleteRollout", False)
         rollout_deleted = False
@@ -1309,15 +2244,15 @@ class CodexBridgeServer:
 
         deleted = self._sessions.delete(cid)
         if not deleted:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Session not found: {cid}", is_error=True))
+            return _tool_error(msg_id, f"Session not found: {cid}")
 
         # Optionally delete the rollout file
         if delete_rollout and rollout_path:
             try:
-                path = Path(rollout_path)
-                if path.exists():
-                    path.unlink()
-                    rollout_deleted = True
+                Path(rollout_path).unlink()
+                rollout_deleted = True
+            except FileNotFoundError:
+                pass
             except Exception as e:
                 rollout_error = str(e)
 
@@ -1332,111 +2267,129 @@ class CodexBridgeServer:
     def _handle_read_rollout_tool(self, msg_id: Any, args: dict) -> dict:
         cid = args.get("conversationId")
         if not isinstance(cid, str) or not cid:
-            return _jsonrpc_response(msg_id, _tool_text_result("conversationId is required", is_error=True))
+            return _tool_error(msg_id, "conversationId is required")
 
-        lines_count = args.get("lines", 50)
-        if not isinstance(lines_count, int):
-            lines_count = 50
-        lines_count = max(1, min(500, lines_count))
+        lines_count = _int_arg(args, "lines", 50, 1, 500)
+        count_lines = args.get("countLines", True) is not False
 
         session = self._sessions.get(cid)
         if session is None:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Session not found: {cid}", is_error=True))
+            return _tool_error(msg_id, f"Session not found: {cid}")
 
         rollout_path = session.rollout_path
         if not rollout_path:
-            return _jsonrpc_response(msg_id, _tool_text_result("Session has no rollout path", is_error=True))
+            return _tool_error(msg_id, "Session has no rollout path")
 
         try:
             path = Path(rollout_path)
-            if not path.exists():
-                return _jsonrpc_response(msg_id, _tool_text_result(f"Rollout file not found: {rollout_path}", is_error=True))
-
-            # Read last N lines efficiently
-            with path.open("r", encoding="utf-8") as f:
-                all_lines = f.readlines()
-            last_lines = all_lines[-lines_count:]
+            last_lines, total_lines = _read_tail_lines(path, lines_count, count_lines=count_lines)
 
             payload = {
                 "conversationId": cid,
                 "rolloutPath": rollout_path,
                 "linesRequested": lines_count,
                 "linesReturned": len(last_lines),
-                "totalLines": len(all_lines),
-                "content": "".join(last_lines),
+                "totalLines": total_lines,
+                "content": b"".join(last_lines).decode("utf-8", errors="replace"),
             }
             return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
+        except FileNotFoundError:
+            return _tool_error(msg_id, f"Rollout file not found: {rollout_path}")
         except Exception as e:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Error reading rollout: {e}", is_error=True))
+            return _tool_error(msg_id, f"Error reading rollout: {e}")
 
     def _handle_export_session_tool(self, msg_id: Any, args: dict) -> dict:
         cid = args.get("conversationId")
         if not isinstance(cid, str) or not cid:
-            return _jsonrpc_response(msg_id, _tool_text_result("conversationId is required", is_error=True))
+            return _tool_error(msg_id, "conversationId is required")
 
         export_format = args.get("format", "markdown")
         if export_format not in ("markdown", "json"):
             export_format = "markdown"
 
+        max_messages = _int_arg(args, "maxMessages", 5000, 1, 50000)
+
         session = self._sessions.get(cid)
         if session is None:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Session not found: {cid}", is_error=True))
+            return _tool_error(msg_id, f"Session not found: {cid}")
 
         rollout_path = session.rollout_path
         if not rollout_path:
-            return _jsonrpc_response(msg_id, _tool_text_result("Session has no rollout path", is_error=True))
+            return _tool_error(msg_id, "Session has no rollout path")
 
         try:
             path = Path(rollout_path)
-            if not path.exists():
-                return _jsonrpc_response(msg_id, _tool_text_result(f"Rollout file not found: {rollout_path}", is_error=True))
-
             # Parse the rollout JSONL file
             messages: List[dict] = []
-            with path.open("r", encoding="utf-8") as f:
+            # Loop-invariant lookups hoisted into locals; rollouts run to many MB.
+            append_message = messages.append
+            loads = _json_loads
+            # Contents of the last few messages: a response_item repeating one of
+            # them duplicates an event_msg already captured.
+            recent_contents: deque = deque(maxlen=_EXPORT_DEDUP_WINDOW)
+            # Bytes go straight to the JSON backend; blank or torn lines fail to
+            # parse and are skipped like any other malformed entry.
+            truncated = False
+            with path.open("rb") as f:
                 for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
                     try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
+                        entry = loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(entry, dict):
                         continue
 
                     event_type = entry.get("type")
-                    payload = entry.get("payload", {})
-
-                    # Extract user messages
-                    if event_type == "event_msg" and payload.get("type") == "user_message":
-                        messages.append({
-                            "role": "user",
-                            "content": payload.get("message", ""),
-                            "timestamp": entry.get("timestamp"),
-                        })
-
-                    # Extract assistant messages
-                    if event_type == "event_msg" and payload.get("type") == "agent_message":
-                        messages.append({
-                            "role": "assistant",
-                            "content": payload.get("message", ""),
+                    if event_type != "event_msg" and event_type != "response_item":
+                        continue
+                    payload = entry.get("payload")
+                    if not isinstance(payload, dict):
+                        continue
+                    payload_type = payload.get("type")
+
+                    if event_type == "event_msg":
+                        # Extract user and assistant messages
+                        if payload_type == "user_message":
+                            role = "user"
+                        elif payload_type == "agent_message":
+                            role = "assistant"
+                        else:
+                            continue
+                        # Only a message that would be kept past the cap truncates.
+                        if len(messages) >= max_messages:
+                            truncated = True
+                            break
+                        content = payload.get("message", "")
+                        recent_contents.append(content)
+                        append_message({
+                            "role": role,
+                            "content": content,
                             "timestamp": entry.get("timestamp"),
                         })
 
                     # Also capture response_item messages for completeness
-                    if event_type == "response_item" and payload.get("type") == "message":
+                    elif payload_type == "message":
                         role = payload.get("role")
-                        content_items = payload.get("content", [])
+                        if role != "user" and role != "assistant":
+                            continue
+                        content_items = payload.get("content")
+                        if not isinstance(content_items, list):
+                            continue
                         text_parts = []
                         for item in content_items:
                             if isinstance(item, dict) and item.get("type") in ("input_text", "output_text"):
                                 text = item.get("text", "")
                                 if text:
                                     text_parts.append(text)
-                        if text_parts and role in ("user", "assistant"):
+                        if text_parts:
                             # Skip if this is a duplicate of an event_msg we already captured
                             combined_text = "\n".join(text_parts)
-                            if not messages or messages[-1].get("content") != combined_text:
-                                messages.append({
+                            if combined_text not in recent_contents:
+                                if len(messages) >= max_messages:
+                                    truncated = True
+                                    break
+                                recent_contents.append(combined_text)
+                                append_message({
                                     "role": role,
                                     "content": combined_text,
                                     "timestamp": entry.get("timestamp"),
@@ -1449,35 +2402,30 @@ class CodexBridgeServer:
                     "model": session.model,
                     "messages": messages,
                 }
+                if truncated:
+                    payload["truncated"] = True
                 return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
 
             # Format as markdown
+            sandbox_type = (session.sandbox_policy or {}).get("type", "unknown")
             md_lines = [
-                f"# Codex Session: {session.name or cid}",
-                "",
-                "## Metadata",
-                f"- **Conversation ID**: `{cid}`",
-                f"- **Model**: {session.model or 'unknown'}",
-                f"- **Sandbox**: {session.sandbox_policy.get('type', 'unknown') if session.sandbox_policy else 'unknown'}",
-                f"- **Reasoning Effort**: {session.reasoning_effort or 'unknown'}",
-                "",
-                "## Conversation",
-                "",
+                f"# Codex Session: {session.name or cid}\n"
+                "\n"
+                "## Metadata\n"
+                f"- **Conversation ID**: `{cid}`\n"
+                f"- **Model**: {session.model or 'unknown'}\n"
+                f"- **Sandbox**: {sandbox_type}\n"
+                f"- **Reasoning Effort**: {session.reasoning_effort or 'unknown'}\n"
+                "\n"
+                "## Conversation\n"
             ]
 
-            for msg in messages:
-                role = msg.get("role", "unknown")
-                content = msg.get("content", "")
-                timestamp = msg.get("timestamp", "")
-
-                if role == "user":
-                    md_lines.append(f"### User {f'({timestamp})' if timestamp else ''}")
-                else:
-                    md_lines.append(f"### Assistant {f'({timestamp})' if timestamp else ''}")
-
-                md_lines.append("")
-                md_lines.append(content)
-                md_lines.append("")
+            # One block per message: heading, blank line, content, blank line.
+            md_lines.extend(
+                f"### {'User' if msg['role'] == 'user' else 'Assistant'} "
+                f"{'(' + str(msg['timestamp']) + ')' if msg['timestamp'] else ''}\n\n{msg['content']}\n"
+                for msg in messages
+            )
 
             markdown = "\n".join(md_lines)
             payload = {
@@ -1485,15 +2433,23 @@ class CodexBridgeServer:
                 "format": "markdown",
                 "content": markdown,
             }
+            if truncated:
+                payload["truncated"] = True
             return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
 
+        except FileNotFoundError:
+            return _tool_error(msg_id, f"Rollout file not found: {rollout_path}")
         except Exception as e:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Error exporting session: {e}", is_error=True))
+            return _tool_error(msg_id, f"Error exporting session: {e}")
 
     def _handle_bridge_info_tool(self, msg_id: Any) -> dict:
+        payload = self._build_bridge_info_payload()
+        return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
+
+    def _build_bridge_info_payload(self) -> dict:
         codex_version = _get_codex_version(self._codex_binary) if self._codex_binary else None
         upstream_info = self._client.server_info() if self._client is not None else None
-        payload = {
+        return {
             "bridgeVersion": BRIDGE_VERSION,
             "protocolVersion": MCP_PROTOCOL_VERSION,
             "codexBinary": self._codex_binary,
@@ -1504,40 +2460,32 @@ class CodexBridgeServer:
             "sessionsFile": str(self._sessions.path),
             "sessionCount": self._sessions.count(),
         }
-        return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
 
     def _handle_bridge_options_tool(self, msg_id: Any) -> dict:
-        enums: dict = {}
-        if self._codex_binary:
-            schema_path = _ensure_schema_cache(self._codex_binary, self._state_dir)
-            if schema_path is not None:
-                enums = _extract_enums_from_schema(schema_path)
-        if not enums.get("reasoningEffort"):
-            enums["reasoningEffort"] = ["none", "minimal", "low", "medium", "high", "xhigh"]
-        if not enums.get("reasoningSummary"):
-            enums["reasoningSummary"] = ["auto", "concise", "detailed", "none"]
-
-        models = _discover_gpt52_models(self._codex_binary or "", self._sessions) if self._codex_binary else None
-        payload = {
-            "sandboxModes": ["read-only", "workspace-write", "danger-full-access"],
-            "approvalPolicies": ["untrusted", "on-failure", "on-request", "never"],
-            "reasoningEffortValues": enums.get("reasoningEffort"),
-            "reasoningSummaryValues": enums.get("reasoningSummary"),
-            "networkAccessValues": enums.get("networkAccess") or ["restricted", "enabled"],
-            "models": models,
-            "configKeys": {
-                "reasoningEffort": "model_reasoning_effort",
-                "reasoningSummary": "model_reasoning_summary",
-            },
-            "defaults": {
-                "reasoningEffort": DEFAULT_REASONING_EFFORT,
-                "sandbox": DEFAULT_SANDBOX,
-                "taskTypes": TASK_TYPES,
-                "taskModelDefaults": TASK_MODEL_DEFAULTS,
-                "defaultTaskType": DEFAULT_TASK_TYPE,
-            },
-        }
-        return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
+        return _jsonrpc_response(msg_id, _tool_text_result(self._bridge_options_text(), is_error=False))
+
+    def _bridge_options_text(self) -> str:
+        """The codex-bridge-options payload as JSON, re-serialized only when an input changes."""
+        schema_path = _ensure_schema_cache(self._codex_binary, self._state_dir) if self._codex_binary else None
+        models = self._models_info() if self._codex_binary else None
+        cached = self._options_text_cache
+        # _models_info() returns the same dict until the session set changes.
+        if cached is not None and cached[0] == schema_path and cached[1] is models:
+            return cached[2]
+        text = _json_dumps(self._build_bridge_options_payload(schema_path, models))
+        self._options_text_cache = (schema_path, models, text)
+        return text
+
+    def _build_bridge_options_payload(self, schema_path: Optional[Path], models: Optional[dict]) -> dict:
+        with self._options_cache_lock:
+            cached = self._options_cache
+            if cached is None or cached[0] != schema_path:
+                cached = self._options_cache = (schema_path, _options_static_payload(schema_path))
+        payload = dict(cached[1])
+        # Models depend on the sessions seen so far; they are keyed separately above.
+        if models is not None:
+            payload["models"] = models
+        return payload
 
     def _handle_sessions_list_tool(self, msg_id: Any, args: dict) -> dict:
         limit = args.get("limit")
@@ -1548,95 +2496,70 @@ class CodexBridgeServer:
         elif isinstance(limit, int):
             limit_int = max(1, min(200, limit))
         else:
-            return _jsonrpc_response(msg_id, _tool_text_result("limit must be an integer", is_error=True))
+            return _tool_error(msg_id, "limit must be an integer")
         if cursor is not None and not isinstance(cursor, str):
-            return _jsonrpc_response(msg_id, _tool_text_result("cursor must be a string", is_error=True))
+            return _tool_error(msg_id, "cursor must be a string")
         if query is not None and not isinstance(query, str):
-            return _jsonrpc_response(msg_id, _tool_text_result("query must be a string", is_error=True))
+            return _tool_error(msg_id, "query must be a string")
+
+        payload = self._build_sessions_list_payload(limit_int, cursor, query)
+        return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
 
+    def _sessions_resource_text(self) -> str:
+        # Read the version first: a change mid-build only forces one extra rebuild.
+        version = self._sessions.version
+        cached = self._sessions_resource_cache
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        text = _json_dumps(self._build_sessions_list_payload(50, None, None))
+        self._sessions_resource_cache = (version, text)
+        return text
+
+    def _build_sessions_list_payload(self, limit: int, cursor: Optional[str], query: Optional[str]) -> dict:
         # If query is provided, search by name instead of listing
         if query:
-            results = self._sessions.search(query=query, limit=limit_int)
-            payload = {"data": [_session_info_payload(info) for info in results], "nextCursor": None}
-        else:
-            payload = self._sessions.list(limit=limit_int, cursor=cursor)
-        return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
+            return self._sessions.search_page(query, limit=limit, cursor=cursor)
+        return self._sessions.list(limit=limit, cursor=cursor)
 
     def _handle_name_session_tool(self, msg_id: Any, args: dict) -> dict:
         cid = args.get("conversationId")
         name = args.get("name")
         if not isinstance(cid, str) or not cid:
-            return _jsonrpc_response(msg_id, _tool_text_result("conversationId is required", is_error=True))
+            return _tool_error(msg_id, "conversationId is required")
         if not isinstance(name, str) or not name:
-            return _jsonrpc_response(msg_id, _tool_text_result("name is required", is_error=True))
+            return _tool_error(msg_id, "name is required")
         updated = self._sessions.update(conversation_id=cid, name=name)
         if updated is None:
-            return _jsonrpc_response(msg_id, _tool_text_result(f"Session not found: {cid}", is_error=True))
+            return _tool_error(msg_id, f"Session not found: {cid}")
         return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(_session_info_payload(updated)), is_error=False))
 
     def _handle_session_get_tool(self, msg_id: Any, args: dict) -> dict:
         cid = args.get("conversationId")
         if not isinstance(cid, str) or not cid:
-            return _jsonrpc_response(msg_id, _tool_text_result("conversationId must be a string", is_error=True))
+            return _tool_error(msg_id, "conversationId must be a string")
         info = self._sessions.get(cid)
         payload = _session_info_payload(info) if info is not None else None
         return _jsonrpc_response(msg_id, _tool_text_result(_json_dumps(payload), is_error=False))
 
     def _tool_call_worker(self, msg_id: Any, tool_name: str, args: dict) -> None:
         try:
-            with self._inflight_lock:
-                inflight = self._inflight.get(msg_id)
+            inflight = self._inflight.get(msg_id)
             if inflight is None:
                 return
 
-            if tool_name == "codex":
-                resp = self._handle_codex_tool(msg_id, args, inflight)
-                self._send(resp)
-                return
-            if tool_name == "codex-reply":
-                resp = self._handle_codex_reply_tool(msg_id, args, inflight)
-                self._send(resp)
-                return
-            if tool_name == "codex-bridge-info":
-                self._send(self._handle_bridge_info_tool(msg_id))
-                return
-            if tool_name == "codex-bridge-options":
-                self._send(self._handle_bridge_options_tool(msg_id))
-                return
-            if tool_name == "codex-bridge-sessions":
-                self._send(self._handle_sessions_list_tool(msg_id, args))
-                return
-            if tool_name == "codex-bridge-session":
-                self._send(self._handle_session_get_tool(msg_id, args))
-                return
-            if tool_name == "codex-bridge-name-session":
-                self._send(self._handle_name_session_tool(msg_id, args))
-                return
-            if tool_name == "codex-bridge-delete-session":
-                self._send(self._handle_delete_session_tool(msg_id, args))
-                return
-            if tool_name == "codex-bridge-read-rollout":
-                self._send(self._handle_read_rollout_tool(msg_id, args))
+            handler = self._tool_handlers.get(tool_name)
+            if handler is None:
+                self._send(_tool_error(msg_id, f"Unknown tool: {tool_name}"))
                 return
-            if tool_name == "codex-bridge-export-session":
-                self._send(self._handle_export_session_tool(msg_id, args))
-                return
-
-            self._send(
-                _jsonrpc_response(
-                    msg_id,
-                    _tool_text_result(f"Unknown tool: {tool_name}", is_error=True),
-                )
-            )
+            self._send(handler(msg_id, args, inflight))
         except CancelledError as e:
-            self._send(_jsonrpc_response(msg_id, _tool_text_result(str(e), is_error=True)))
+            self._send(_tool_error(msg_id, str(e)))
         except TimeoutError as e:
-            self._send(_jsonrpc_response(msg_id, _tool_text_result(str(e), is_error=True)))
+            self._send(_tool_error(msg_id, str(e)))
         except Exception as e:
-            self._send(_jsonrpc_response(msg_id, _tool_text_result(f"Bridge error: {e}", is_error=True)))
+            self._send(_tool_error(msg_id, f"Bridge error: {e}"))
         finally:
-            with self._inflight_lock:
-                self._inflight.pop(msg_id, None)
+            self._inflight.pop(msg_id, None)
 
     def handle(self, msg: dict) -> Any:
         method = msg.get("method")
@@ -1647,162 +2570,179 @@ class CodexBridgeServer:
         if "id" in msg and (isinstance(msg_id, bool) or not isinstance(msg_id, (str, int, float, type(None)))):
             return _jsonrpc_error(None, JSONRPC_INVALID_REQUEST, "Invalid Request: id must be string, number, or null")
 
-        if method == "initialize" and msg_id is not None:
-            params = msg.get("params") or {}
-            requested_version = None
-            if isinstance(params, dict):
-                pv = params.get("protocolVersion")
-                if isinstance(pv, str) and pv:
-                    requested_version = pv
-            return {
-                "jsonrpc": "2.0",
-                "id": msg_id,
-                "result": {
-                    "protocolVersion": requested_version or MCP_PROTOCOL_VERSION,
-                    "capabilities": {
-                        "tools": {"listChanged": False},
-                        "resources": {"subscribe": False, "listChanged": False},
-                        "prompts": {"listChanged": False},
-                    },
-                    "serverInfo": {"name": "codex-bridge", "title": "Codex Bridge", "version": BRIDGE_VERSION},
-                },
-            }
-
-        if method == "shutdown" and msg_id is not None:
-            return _jsonrpc_response(msg_id, None)
+        handler = None
+        if isinstance(method, str):
+            handler = self._notification_handlers.get(method)
+            if handler is None and msg_id is not None:
+                handler = self._request_handlers.get(method)
+        if handler is not None:
+            return handler(msg, msg_id)
 
-        if method == "exit":
-            self._should_exit.set()
-            return None
-
-        if method == "$/cancelRequest":
-            params = msg.get("params") or {}
-            cancel_id = params.get("id")
-            with self._inflight_lock:
-                inflight = self._inflight.get(cancel_id)
-            if inflight is not None:
-                inflight.cancel_event.set()
-                if inflight.upstream_request_id is not None:
-                    try:
-                        self._get_client().cancel_request(inflight.upstream_request_id)
-                    except Exception:
-                        pass
-            return None
+        if msg_id is not None:
+            return _jsonrpc_error(msg_id, JSONRPC_METHOD_NOT_FOUND, f"Method not found: {method}")
+        return None
 
-        if method == "tools/list" and msg_id is not None:
-            return {"jsonrpc": "2.0", "id": msg_id, "result": {"tools": self._tools_list()}}
+    def _on_initialize(self, msg: dict, msg_id: Any) -> dict:
+        params = msg.get("params") or {}
+        requested_version = None
+        if isinstance(params, dict):
+            pv = params.get("protocolVersion")
+            if isinstance(pv, str) and pv:
+                requested_version = pv
+        result = {
+            "protocolVersion": requested_version or MCP_PROTOCOL_VERSION,
+            "capabilities": _SERVER_CAPABILITIES,
+            "serverInfo": _SERVER_INFO,
+        }
+        return _jsonrpc_response(msg_id, result)
 
-        if method == "prompts/list" and msg_id is not None:
-            return {"jsonrpc": "2.0", "id": msg_id, "result": {"prompts": []}}
+    def _on_shutdown(self, msg: dict, msg_id: Any) -> dict:
+        return _jsonrpc_response(msg_id, None)
 
-        if method == "resources/list" and msg_id is not None:
-            resources = [
-                {
-                    "uri": "codex-bridge://info",
-                    "name": "Codex Bridge Info",
-                    "mimeType": "application/json",
-                    "description": "Bridge versions and state.",
-                },
-                {
-                    "uri": "codex-bridge://options",
-                    "name": "Codex Bridge Options",
-                    "mimeType": "application/json",
-                    "description": "Common models/enums/options.",
-                },
-                {
-                    "uri": "codex-bridge://sessions",
-                    "name": "Codex Bridge Sessions",
-                    "mimeType": "application/json",
-                    "description": "Known conversations captured by the bridge.",
-                },
-            ]
-            return {"jsonrpc": "2.0", "id": msg_id, "result": {"resources": resources}}
-
-        if method == "resources/read" and msg_id is not None:
-            params = msg.get("params") or {}
-            uri = params.get("uri")
-            if not isinstance(uri, str):
-                return _jsonrpc_error(msg_id, JSONRPC_INVALID_PARAMS, "resources/read requires {uri: string}")
-            if uri == "codex-bridge://info":
-                info = json.loads(self._handle_bridge_info_tool(0)["result"]["content"][0]["text"])
-                return _jsonrpc_response(
-                    msg_id, {"contents": [{"uri": uri, "mimeType": "application/json", "text": _json_dumps(info)}]}
-                )
-            if uri == "codex-bridge://options":
-                info = json.loads(self._handle_bridge_options_tool(0)["result"]["content"][0]["text"])
-                return _jsonrpc_response(
-                    msg_id, {"contents": [{"uri": uri, "mimeType": "application/json", "text": _json_dumps(info)}]}
-                )
-            if uri == "codex-bridge://sessions":
-                info = json.loads(self._handle_sessions_list_tool(0, {})["result"]["content"][0]["text"])
-                return _jsonrpc_response(
-                    msg_id, {"contents": [{"uri": uri, "mimeType": "application/json", "text": _json_dumps(info)}]}
-                )
-            if uri.startswith("codex-bridge://session/"):
-                cid = uri.split("/", 3)[-1]
-                info_obj = json.loads(self._handle_session_get_tool(0, {"conversationId": cid})["result"]["content"][0]["text"])
-                return _jsonrpc_response(
-                    msg_id,
-                    {"contents": [{"uri": uri, "mimeType": "application/json", "text": _json_dumps(info_obj)}]},
-                )
-            return _jsonrpc_error(msg_id, JSONRPC_INVALID_PARAMS, f"Unknown resource URI: {uri}")
-
-        if method == "resources/templates/list" and msg_id is not None:
-            templates = [
-                {
-                    "uriTemplate": "codex-bridge://session/{conversationId}",
-                    "name": "Session by conversationId",
-                    "description": "Session metadata captured by the bridge.",
-                }
-            ]
-            return _jsonrpc_response(msg_id, {"resourceTemplates": templates})
-
-        if method == "tools/call" and msg_id is not None:
-            params = msg.get("params") or {}
-            tool_name = params.get("name")
-            args = params.get("arguments") or {}
-            if not isinstance(tool_name, str):
-                return _jsonrpc_response(
-                    msg_id, _tool_text_result("tools/call requires params.name: string", is_error=True)
-                )
-            if not isinstance(args, dict):
-                return _jsonrpc_response(
-                    msg_id, _tool_text_result("tools/call requires params.arguments: object", is_error=True)
-                )
-            with self._inflight_lock:
-                if msg_id in self._inflight:
-                    return _jsonrpc_response(
-                        msg_id, _tool_text_result("Duplicate request id (already in-flight)", is_error=True)
-                    )
-                inflight = InflightRequest(cancel_event=threading.Event())
-                self._inflight[msg_id] = inflight
-            t = threading.Thread(target=self._tool_call_worker, args=(msg_id, tool_name, dict(args)), daemon=True)
-            t.start()
-            return _ASYNC
+    def _on_exit(self, msg: dict, msg_id: Any) -> None:
+        self._should_exit.set()
+        return None
 
-        if msg_id is not None:
-            return _jsonrpc_error(msg_id, JSONRPC_METHOD_NOT_FOUND, f"Method not found: {method}")
+    def _on_cancel_request(self, msg: dict, msg_id: Any) -> None:
+        params = msg.get("params")
+        cancel_id = params.get("id") if isinstance(params, dict) else None
+        if not isinstance(cancel_id, (str, int, float)):
+            return None
+        inflight = self._inflight.get(cancel_id)
+        if inflight is not None:
+            # Only flag the worker: its wait on the upstream reply wakes on the event
+            # and forwards $/cancelRequest itself, so stdin is never blocked on the pipe.
+            inflight.cancel_event.set()
         return None
 
+    def _on_tools_list(self, msg: dict, msg_id: Any) -> dict:
+        return _jsonrpc_response(msg_id, self._tools_list_result())
+
+    def _on_prompts_list(self, msg: dict, msg_id: Any) -> dict:
+        return _jsonrpc_response(msg_id, _PROMPTS_LIST_RESULT)
+
+    def _on_resources_list(self, msg: dict, msg_id: Any) -> dict:
+        return _jsonrpc_response(msg_id, _RESOURCES_LIST_RESULT)
+
+    def _on_resource_templates_list(self, msg: dict, msg_id: Any) -> dict:
+        return _jsonrpc_response(msg_id, _RESOURCE_TEMPLATES_LIST_RESULT)
+
+    def _on_resources_read(self, msg: dict, msg_id: Any) -> dict:
+        params = msg.get("params") or {}
+        uri = params.get("uri")
+        if not isinstance(uri, str):
+            return _jsonrpc_error(msg_id, JSONRPC_INVALID_PARAMS, "resources/read requires {uri: string}")
+        if uri == "codex-bridge://info":
+            return _jsonrpc_response(msg_id, _json_resource_result(uri, self._build_bridge_info_payload()))
+        if uri == "codex-bridge://options":
+            return _jsonrpc_response(msg_id, _json_text_resource_result(uri, self._bridge_options_text()))
+        if uri == "codex-bridge://sessions":
+            return _jsonrpc_response(msg_id, _json_text_resource_result(uri, self._sessions_resource_text()))
+        if uri.startswith("codex-bridge://session/"):
+            cid = uri.split("/", 3)[-1]
+            if not cid:
+                return _jsonrpc_error(msg_id, JSONRPC_INVALID_PARAMS, "Session resource requires a conversationId")
+            info = self._sessions.get(cid)
+            payload = _session_info_payload(info) if info is not None else None
+            return _jsonrpc_response(msg_id, _json_resource_result(uri, payload))
+        return _jsonrpc_error(msg_id, JSONRPC_INVALID_PARAMS, f"Unknown resource URI: {uri}")
+
+    def _on_tools_call(self, msg: dict, msg_id: Any) -> Any:
+        params = msg.get("params") or {}
+        tool_name = params.get("name")
+        args = params.get("arguments") or {}
+        if not isinstance(tool_name, str):
+            return _tool_error(msg_id, "tools/call requires params.name: string")
+        if not isinstance(args, dict):
+            return _tool_error(msg_id, "tools/call requires params.arguments: object")
+        with self._inflight_lock:
+            if msg_id in self._inflight:
+                return _tool_error(msg_id, "Duplicate request id (already in-flight)")
+            if len(self._inflight) >= _TOOL_CALL_MAX_PENDING:
+                return _tool_error(msg_id, "Too many tool calls in flight; retry later")
+            inflight = InflightRequest(cancel_event=CancelEvent())
+            self._inflight[msg_id] = inflight
+        try:
+            # The parsed frame is not used after dispatch, so the worker may consume
+            # (pop from) args in place rather than from a copy.
+            pool = self._local_tool_pool if tool_name.startswith(_LOCAL_TOOL_PREFIX) else self._tool_pool
+            pool.submit(self._tool_call_worker, msg_id, tool_name, args)
+        except RuntimeError:
+            # Pool already shut down (exit in progress).
+            self._inflight.pop(msg_id, None)
+            return _tool_error(msg_id, "Bridge is shutting down")
+        return _ASYNC
+
     def should_exit(self) -> bool:
         return self._should_exit.is_set()
 
+    def close(self) -> None:
+        """Cancel in-flight tool calls and stop the worker pool and upstream client."""
+        self._should_exit.set()
+        inflight = list(self._inflight.values())
+        for req in inflight:
+            req.cancel_event.set()
+        self._tool_pool.shutdown(wait=False)
+        self._local_tool_pool.shutdown(wait=False)
+        if self._client is not None:
+            self._client.close()
+        # Flush captured sessions still in the queue, then stop the writer.
+        try:
+            self._session_queue.put(_SESSION_WRITER_STOP, timeout=1.0)
+        except queue.Full:
+            return
+        self._session_writer_thread.join(timeout=2.0)
+
+
+def _stdin_frames(stop_fd: Optional[int]) -> Iterable[Union[str, bytes]]:
+    """Frames from stdin as bytes; the selector loop is used where stdin is a real fd."""
+    if stop_fd is not None and os.name != "nt":
+        try:
+            return _iter_fd_lines(sys.stdin.fileno(), stop_fd)
+        except (AttributeError, OSError, ValueError):
+            pass
+    return getattr(sys.stdin, "buffer", sys.stdin)
+
 
 def main() -> None:
     server = CodexBridgeServer()
-    for line in sys.stdin:
-        msg, err_code, err_msg = _try_parse_json(line)
-        if err_code is not None:
-            # Parse errors do not include an id.
-            server._send(_jsonrpc_error(None, err_code, err_msg or "Error"))
-            continue
-        if not msg:
-            continue
-        resp = server.handle(msg)
-        if resp is not None and resp is not _ASYNC:
-            server._send(resp)
-        if server.should_exit():
-            break
+    # SIGTERM wakes the stdin loop through a self-pipe so the server can shut down
+    # cleanly (cancel in-flight calls, flush captured sessions) instead of dying.
+    stop_r: Optional[int] = None
+    stop_w: Optional[int] = None
+    if os.name != "nt":
+        stop_r, stop_w = os.pipe()
+        os.set_blocking(stop_w, False)
+
+        def request_stop(signum: int, frame: Any) -> None:
+            try:
+                os.write(stop_w, b"\0")
+            except OSError:
+                pass
+
+        signal.signal(signal.SIGTERM, request_stop)
+    # Frames stay bytes end to end: both JSON backends parse UTF-8 directly.
+    try:
+        for line in _stdin_frames(stop_r):
+            msg, err_code, err_msg = _try_parse_json(line)
+            if err_code is not None:
+                # Parse errors do not include an id.
+                server._send(_jsonrpc_error(None, err_code, err_msg or "Error"))
+                continue
+            if not msg:
+                continue
+            resp = server.handle(msg)
+            if resp is not None and resp is not _ASYNC:
+                server._send(resp)
+            if server.should_exit():
+                break
+    finally:
+        # Pool workers are not daemon threads; cancel them so exit is not held up.
+        server.close()
+        if stop_w is not None:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            os.close(stop_r)
+            os.close(stop_w)
 
 
 if __name__ == "__main__":
@@ -102,3 +102,59 @@ def mock_subprocess() -> Generator[MagicMock, None, None]:
         mock_proc.stderr = MagicMock()
         mock_popen.return_value = mock_proc
         yield mock_popen
+
+
+FAKE_CODEX_MCP_SERVER = r"""
+import json
+import sys
+
+for raw in sys.stdin.buffer:
+    msg = json.loads(raw)
+    method = msg.get("method")
+    rid = msg.get("id")
+    if method == "initialize":
+        result = {"serverInfo": {"name": "fake-codex", "version": "0.0.1"}}
+    elif method == "tools/list":
+        result = {"tools": [{"name": "codex"}, {"name": "codex-reply"}]}
+    elif method == "tools/call":
+        args = msg["params"]["arguments"]
+        event = {
+            "jsonrpc": "2.0",
+            "method": "codex/event",
+            "params": {
+                "_meta": {"requestId": rid},
+                "msg": {"type": "session_configured", "session_id": "fake-" + str(rid), "model": args.get("model")},
+            },
+        }
+        sys.stdout.write(json.dumps(event) + "\n")
+        text = args.get("prompt", "")
+        if text == "exit":
+            sys.exit(0)
+        if text == "hang":
+            sys.stdout.flush()
+            continue
+        result = {"content": [{"type": "text", "text": "echo: " + text}]}
+    else:
+        continue
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": rid, "result": result}, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+"""
+
+
+@pytest.fixture
+def fake_codex_binary(temp_state_dir: Path) -> Generator[str, None, None]:
+    """Create a fake `codex mcp-server` that answers initialize, tools/list and tools/call."""
+    script = temp_state_dir / "fake_codex"
+    script.write_text(f"#!{sys.executable}\n" + FAKE_CODEX_MCP_SERVER)
+    script.chmod(0o755)
+    yield str(script)
+
+
+@pytest.fixture
+def fake_client(fake_codex_binary: str) -> Generator[cbm.CodexMcpClient, None, None]:
+    """A CodexMcpClient connected to the fake Codex MCP server; closed on teardown."""
+    client = cbm.CodexMcpClient(fake_codex_binary)
+    try:
+        yield client
+    finally:
+        client.close()
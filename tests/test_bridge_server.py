@@ -1,14 +1,17 @@
 """Tests for CodexBridgeServer class."""
 from __future__ import annotations
 
+import dataclasses
 import json
+import os
+import subprocess
 import sys
 import tempfile
 import threading
 import time
 from io import StringIO
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 from unittest.mock import MagicMock, patch, PropertyMock
 
 import pytest
@@ -41,6 +44,7 @@ def bridge_server(temp_state_dir: Path, mock_codex_client):
             server._client = mock_codex_client
             server._codex_binary = "/usr/bin/codex"
             yield server
+            server.close()
 
 
 class TestBridgeServerInit:
@@ -69,6 +73,17 @@ class TestBridgeServerInit:
 
                 assert server._session_writer_thread.is_alive()
 
+    def test_close_flushes_sessions_and_stops_writer(self, temp_state_dir: Path):
+        with patch("codex_bridge_mcp._find_codex_binary", return_value="/usr/bin/codex"):
+            with patch("codex_bridge_mcp._get_state_dir", return_value=temp_state_dir):
+                server = cbm.CodexBridgeServer()
+                server._enqueue_session(cbm.SessionInfo(conversation_id="queued", captured_at=1.0))
+
+                server.close()
+
+                assert not server._session_writer_thread.is_alive()
+                assert server._sessions.get("queued") is not None
+
 
 class TestBridgeServerIdValidation:
     """Tests for JSON-RPC id validation."""
@@ -223,6 +238,29 @@ class TestBridgeServerToolsList:
         assert "codex" in tool_names
         assert "codex-reply" in tool_names
 
+    def test_result_built_once(self, bridge_server, mock_codex_client):
+        first = bridge_server.handle({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+        second = bridge_server.handle({"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+
+        assert first["result"] is second["result"]
+        assert mock_codex_client.list_tools.call_count == 1
+
+    def test_patches_upstream_schemas_without_mutating_them(self, bridge_server, mock_codex_client):
+        upstream_props = {"prompt": {"type": "string"}, "timeoutMs": {"type": "number"}}
+        upstream = {"name": "codex", "inputSchema": {"type": "object", "properties": upstream_props}}
+        mock_codex_client.list_tools.return_value = [upstream, "not-a-tool", {"name": ["odd"]}]
+
+        tools = bridge_server._tools_list()
+
+        codex = tools[0]
+        props = codex["inputSchema"]["properties"]
+        assert codex["description"].startswith("Run a Codex session")
+        assert props["timeoutMs"] == {"type": "number"}
+        assert "reasoningEffort" in props and "name" in props
+        assert set(upstream_props) == {"prompt", "timeoutMs"}
+        assert "description" not in upstream
+        assert tools[1] == {"name": ["odd"]}
+
 
 class TestBridgeServerResourcesList:
     """Tests for resources/list handling."""
@@ -280,6 +318,49 @@ class TestBridgeServerResourcesRead:
         assert "sandboxModes" in data
         assert "approvalPolicies" in data
 
+    def test_options_static_part_cached_models_fresh(self, bridge_server):
+        def read_options():
+            response = bridge_server._handle_bridge_options_tool(1)
+            return json.loads(response["result"]["content"][0]["text"])
+
+        with patch("codex_bridge_mcp._ensure_schema_cache", return_value=None), patch(
+            "codex_bridge_mcp._options_static_payload", wraps=cbm._options_static_payload
+        ) as build:
+            first = read_options()
+            bridge_server._sessions.add(cbm.SessionInfo(conversation_id="c-new", captured_at=1.0, model="new-model"))
+            second = read_options()
+
+        assert build.call_count == 1
+        assert "new-model" not in first["models"]["available"]
+        assert "new-model" in second["models"]["available"]
+        assert list(first) == list(second)
+
+    def test_options_text_reused_until_inputs_change(self, bridge_server):
+        with patch("codex_bridge_mcp._ensure_schema_cache", return_value=None), patch.object(
+            bridge_server, "_build_bridge_options_payload", wraps=bridge_server._build_bridge_options_payload
+        ) as build:
+            first = bridge_server._bridge_options_text()
+            assert bridge_server._bridge_options_text() is first
+            resource = bridge_server.handle(
+                {"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {"uri": "codex-bridge://options"}}
+            )
+            assert resource["result"]["contents"][0]["text"] is first
+            assert build.call_count == 1
+
+            bridge_server._sessions.add(cbm.SessionInfo(conversation_id="c-new", captured_at=1.0, model="new-model"))
+            assert "new-model" in bridge_server._bridge_options_text()
+            assert build.call_count == 2
+
+    def test_models_info_cached_until_sessions_change(self, bridge_server):
+        with patch("codex_bridge_mcp._discover_gpt52_models", wraps=cbm._discover_gpt52_models) as discover:
+            first = bridge_server._models_info()
+            assert bridge_server._models_info() is first
+            bridge_server._sessions.add(cbm.SessionInfo(conversation_id="m", captured_at=1.0, model="o3"))
+            second = bridge_server._models_info()
+
+        assert discover.call_count == 2
+        assert second["authMode"] == "api"
+
     def test_read_sessions_resource(self, bridge_server, sample_session_info):
         # Add a session
         bridge_server._sessions.add(sample_session_info)
@@ -301,6 +382,55 @@ class TestBridgeServerResourcesRead:
         assert len(data["data"]) == 1
         assert data["data"][0]["conversationId"] == sample_session_info.conversation_id
 
+    def test_sessions_resource_reserialized_only_on_change(self, bridge_server, sample_session_info):
+        bridge_server._sessions.add(sample_session_info)
+        cid = sample_session_info.conversation_id
+
+        def read():
+            response = bridge_server.handle(
+                {"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {"uri": "codex-bridge://sessions"}}
+            )
+            return response["result"]["contents"][0]["text"]
+
+        first = read()
+        assert read() is first
+
+        bridge_server._sessions.increment_history(cid)
+        bumped = read()
+        assert bumped is not first
+        assert json.loads(bumped)["data"][0]["historyEntryCount"] == sample_session_info.history_entry_count + 1
+
+        bridge_server._sessions.update(cid, name="renamed")
+        assert json.loads(read())["data"][0]["name"] == "renamed"
+
+        bridge_server._sessions.delete(cid)
+        assert json.loads(read())["data"] == []
+
+    def test_read_session_resource(self, bridge_server, sample_session_info):
+        bridge_server._sessions.add(sample_session_info)
+        uri = f"codex-bridge://session/{sample_session_info.conversation_id}"
+
+        response = bridge_server.handle(
+            {"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {"uri": uri}}
+        )
+
+        data = json.loads(response["result"]["contents"][0]["text"])
+        assert data["conversationId"] == sample_session_info.conversation_id
+
+    def test_read_session_resource_unknown_id(self, bridge_server):
+        response = bridge_server.handle(
+            {"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {"uri": "codex-bridge://session/nope"}}
+        )
+
+        assert json.loads(response["result"]["contents"][0]["text"]) is None
+
+    def test_read_session_resource_without_id(self, bridge_server):
+        response = bridge_server.handle(
+            {"jsonrpc": "2.0", "id": 1, "method": "resources/read", "params": {"uri": "codex-bridge://session/"}}
+        )
+
+        assert response["error"]["code"] == cbm.JSONRPC_INVALID_PARAMS
+
     def test_read_unknown_resource(self, bridge_server):
         msg = {
             "jsonrpc": "2.0",
@@ -318,6 +448,33 @@ class TestBridgeServerResourcesRead:
 class TestBridgeServerToolsCall:
     """Tests for tools/call handling."""
 
+    def test_codex_tool_merges_reasoning_into_config(self, bridge_server, mock_codex_client):
+        mock_codex_client.call_tool.return_value = (1, {"result": {"content": [{"type": "text", "text": "ok"}]}})
+        mock_codex_client.get_session_for_request.return_value = None
+        user_config = {"model_verbosity": "low"}
+        args = {"prompt": "hi", "config": user_config, "reasoningEffort": "low", "reasoningSummary": "concise"}
+        inflight = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+
+        bridge_server._handle_codex_tool(1, args, inflight)
+
+        sent_args = mock_codex_client.call_tool.call_args[0][1]
+        assert sent_args["config"] == {
+            "model_verbosity": "low",
+            "model_reasoning_effort": "low",
+            "model_reasoning_summary": "concise",
+        }
+        assert sent_args["config"] is user_config
+
+    def test_codex_tool_defaults_reasoning_effort(self, bridge_server, mock_codex_client):
+        mock_codex_client.call_tool.return_value = (1, {"result": {"content": []}})
+        mock_codex_client.get_session_for_request.return_value = None
+        inflight = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+
+        bridge_server._handle_codex_tool(1, {"prompt": "hi", "config": "bogus"}, inflight)
+
+        sent_args = mock_codex_client.call_tool.call_args[0][1]
+        assert sent_args["config"] == {"model_reasoning_effort": cbm.DEFAULT_REASONING_EFFORT}
+
     def test_call_bridge_info_tool(self, bridge_server):
         msg = {
             "jsonrpc": "2.0",
@@ -386,6 +543,90 @@ class TestBridgeServerToolsCall:
         # Unknown tool should return error (possibly async)
         # The error might be returned synchronously or asynchronously
 
+    def test_every_listed_tool_has_a_handler(self, bridge_server):
+        listed = {tool["name"] for tool in bridge_server._tools_list()}
+        assert listed == set(bridge_server._tool_handlers)
+
+    def test_unknown_tool_reported_by_worker(self, bridge_server, monkeypatch):
+        sent: List[dict] = []
+        monkeypatch.setattr(bridge_server, "_send", sent.append)
+        bridge_server._inflight[7] = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+
+        bridge_server._tool_call_worker(7, "unknown-tool", {})
+
+        assert sent[0]["result"]["isError"] is True
+        assert "Unknown tool: unknown-tool" in sent[0]["result"]["content"][0]["text"]
+
+
+class TestBridgeServerToolPool:
+    """Tests for the bounded tools/call worker pool."""
+
+    def _call(self, server, msg_id, name="codex-bridge-info"):
+        return server.handle(
+            {"jsonrpc": "2.0", "id": msg_id, "method": "tools/call", "params": {"name": name, "arguments": {}}}
+        )
+
+    def test_rejects_when_saturated(self, bridge_server, monkeypatch):
+        monkeypatch.setattr(cbm, "_TOOL_CALL_MAX_PENDING", 1)
+        bridge_server._inflight["busy"] = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+
+        response = self._call(bridge_server, 7)
+
+        assert response["result"]["isError"] is True
+        assert "Too many" in response["result"]["content"][0]["text"]
+        assert 7 not in bridge_server._inflight
+
+    def test_local_tools_not_queued_behind_codex_calls(self, bridge_server, mock_codex_client, monkeypatch):
+        release = threading.Event()
+        mock_codex_client.call_tool.side_effect = lambda *a, **k: release.wait(5.0) and (1, {"result": {}})
+        sent: List[dict] = []
+        monkeypatch.setattr(bridge_server, "_send", sent.append)
+        bridge_server._tool_pool.shutdown(wait=False)
+        bridge_server._tool_pool = cbm.ThreadPoolExecutor(max_workers=1)
+        try:
+            self._call(bridge_server, "slow", name="codex")
+            self._call(bridge_server, "fast")
+
+            deadline = time.monotonic() + 5.0
+            while not any(m.get("id") == "fast" for m in sent) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert any(m.get("id") == "fast" for m in sent)
+            assert "slow" in bridge_server._inflight
+        finally:
+            release.set()
+
+    def test_close_cancels_inflight(self, bridge_server):
+        inflight = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+        bridge_server._inflight["busy"] = inflight
+
+        bridge_server.close()
+
+        assert inflight.cancel_event.is_set()
+        assert bridge_server.should_exit() is True
+
+    def test_call_after_close_is_rejected(self, bridge_server):
+        bridge_server.close()
+
+        response = self._call(bridge_server, 8)
+
+        assert "shutting down" in response["result"]["content"][0]["text"]
+        assert 8 not in bridge_server._inflight
+
+    def test_queued_codex_call_after_close_does_not_respawn(self, bridge_server, mock_codex_client, monkeypatch):
+        sent: List[dict] = []
+        monkeypatch.setattr(bridge_server, "_send", sent.append)
+        bridge_server._inflight[9] = cbm.InflightRequest(cancel_event=cbm.CancelEvent())
+        bridge_server.close()
+        mock_codex_client.is_alive.return_value = False
+
+        with patch("codex_bridge_mcp.CodexMcpClient") as client_cls:
+            bridge_server._tool_call_worker(9, "codex", {"prompt": "hi"})
+
+        client_cls.assert_not_called()
+        assert bridge_server._client is mock_codex_client
+        assert sent[0]["result"]["isError"] is True
+        assert "shutting down" in sent[0]["result"]["content"][0]["text"]
+
 
 class TestBridgeServerCancelRequest:
     """Tests for $/cancelRequest handling."""
@@ -401,6 +642,43 @@ class TestBridgeServerCancelRequest:
         response = bridge_server.handle(msg)
         assert response is None
 
+    def test_cancel_sets_event_without_touching_client(self, bridge_server, mock_codex_client):
+        inflight = cbm.InflightRequest(cancel_event=cbm.CancelEvent(), upstream_request_id=3)
+        bridge_server._inflight[7] = inflight
+
+        with patch.object(bridge_server, "_get_client") as get_client:
+            response = bridge_server.handle({"jsonrpc": "2.0", "method": "$/cancelRequest", "params": {"id": 7}})
+
+        assert response is None
+        assert inflight.cancel_event.is_set()
+        get_client.assert_not_called()
+        mock_codex_client.cancel_request.assert_not_called()
+
+    def test_cancel_with_malformed_params(self, bridge_server):
+        for params in (["x"], {"id": [1]}, {"id": {"a": 1}}, None):
+            msg = {"jsonrpc": "2.0", "method": "$/cancelRequest", "params": params}
+            assert bridge_server.handle(msg) is None
+
+
+class TestBridgeServerDispatch:
+    """Tests for method dispatch in handle()."""
+
+    def test_request_method_without_id_is_ignored(self, bridge_server):
+        assert bridge_server.handle({"jsonrpc": "2.0", "method": "tools/list"}) is None
+
+    def test_unknown_method_with_id(self, bridge_server):
+        response = bridge_server.handle({"jsonrpc": "2.0", "id": 1, "method": "nope"})
+        assert response["error"]["code"] == cbm.JSONRPC_METHOD_NOT_FOUND
+
+    def test_non_string_method(self, bridge_server):
+        response = bridge_server.handle({"jsonrpc": "2.0", "id": 1, "method": ["tools/list"]})
+        assert response["error"]["code"] == cbm.JSONRPC_METHOD_NOT_FOUND
+        assert bridge_server.handle({"jsonrpc": "2.0", "method": {"a": 1}}) is None
+
+    def test_exit_with_id_still_exits(self, bridge_server):
+        assert bridge_server.handle({"jsonrpc": "2.0", "id": 5, "method": "exit"}) is None
+        assert bridge_server.should_exit() is True
+
 
 class TestBridgeServerShouldExit:
     """Tests for should_exit method."""
@@ -417,6 +695,80 @@ class TestBridgeServerShouldExit:
         assert bridge_server.should_exit() is True
 
 
+class TestBridgeServerSend:
+    """Tests for _send framing on stdout."""
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes")
+    def test_stdout_fd_forced_blocking(self, monkeypatch):
+        r, w = os.pipe()
+        try:
+            os.set_blocking(w, False)
+            with os.fdopen(os.dup(w), "w") as fake_stdout:
+                monkeypatch.setattr(sys, "stdout", fake_stdout)
+                fd = cbm._stdout_fileno()
+                assert fd == fake_stdout.fileno()
+                assert os.get_blocking(w) is True
+                monkeypatch.undo()
+        finally:
+            os.close(r)
+            os.close(w)
+
+    def test_writes_one_utf8_line(self, bridge_server, capsysbinary):
+        bridge_server._stdout_fd = None
+        bridge_server._send(cbm._jsonrpc_response(1, {"text": "héllo ✓"}))
+        out = capsysbinary.readouterr().out
+        assert out.endswith(b"\n")
+        assert out.count(b"\n") == 1
+        assert json.loads(out.decode("utf-8"))["result"]["text"] == "héllo ✓"
+
+    def test_writes_directly_to_fd(self, bridge_server, capfdbinary):
+        bridge_server._stdout_fd = 1
+        bridge_server._send(cbm._jsonrpc_response(2, {"text": "x" * 200_000}))
+        out = capfdbinary.readouterr().out
+        assert out.endswith(b"\n")
+        assert out.count(b"\n") == 1
+        assert len(json.loads(out)["result"]["text"]) == 200_000
+
+    def test_partial_writes_are_retried(self, bridge_server):
+        chunks: List[bytes] = []
+
+        def short_write(fd, data):
+            n = min(len(data), 7)
+            chunks.append(bytes(data[:n]))
+            return n
+
+        bridge_server._stdout_fd = 99
+        with patch("codex_bridge_mcp.os.write", side_effect=short_write):
+            bridge_server._send(cbm._jsonrpc_response(3, {"ok": True}))
+        assert json.loads(b"".join(chunks)) == {"jsonrpc": "2.0", "id": 3, "result": {"ok": True}}
+
+    def test_concurrent_frames_share_one_write(self, bridge_server):
+        writes: List[bytes] = []
+
+        def record_write(fd, data):
+            writes.append(bytes(data))
+            return len(data)
+
+        bridge_server._stdout_fd = 99
+        with patch("codex_bridge_mcp.os.write", side_effect=record_write):
+            with bridge_server._write_lock:
+                threads = [
+                    threading.Thread(target=bridge_server._send, args=(cbm._jsonrpc_response(i, None),))
+                    for i in range(3)
+                ]
+                for t in threads:
+                    t.start()
+                deadline = time.monotonic() + 5
+                while len(bridge_server._out_frames) < 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+            for t in threads:
+                t.join(timeout=5)
+
+        assert len(writes) == 1
+        assert sorted(json.loads(line)["id"] for line in writes[0].splitlines()) == [0, 1, 2]
+        assert not bridge_server._out_frames
+
+
 class TestBridgeServerPromptsList:
     """Tests for prompts/list handling."""
 
@@ -496,3 +848,244 @@ class TestBridgeServerIntegration:
                 # Exit
                 server.handle({"jsonrpc": "2.0", "method": "exit"})
                 assert server.should_exit() is True
+
+
+class TestBridgeStaticTools:
+    """Tests for the precomputed static tool schemas."""
+
+    def test_static_tools_are_shared(self):
+        assert cbm._bridge_tools() is cbm._bridge_tools()
+        assert cbm._bridge_extra_tools() is cbm._bridge_extra_tools()
+
+    def test_fallback_tools_list_does_not_mutate_static_schemas(self, bridge_server, mock_codex_client):
+        before = json.dumps(cbm._bridge_tools(), sort_keys=True)
+        mock_codex_client.list_tools.side_effect = RuntimeError("upstream down")
+
+        tools = bridge_server._tools_list()
+
+        names = [t["name"] for t in tools]
+        assert names[:2] == ["codex", "codex-reply"]
+        assert "codex-bridge-info" in names
+        assert json.dumps(cbm._bridge_tools(), sort_keys=True) == before
+
+    def test_fixed_method_results_are_shared(self, bridge_server):
+        for method in ("resources/list", "prompts/list", "resources/templates/list"):
+            first = bridge_server.handle({"jsonrpc": "2.0", "id": 1, "method": method})
+            second = bridge_server.handle({"jsonrpc": "2.0", "id": "b", "method": method})
+            assert first["id"] == 1 and second["id"] == "b"
+            assert first["result"] is second["result"]
+
+
+class TestBridgeServerExportSession:
+    """Tests for the codex-bridge-export-session tool."""
+
+    @staticmethod
+    def _add_rollout(bridge_server, sample_session_info, entries: Union[List[dict], bytes, None]) -> str:
+        """Register a session whose rollout holds entries (JSON lines or raw bytes); None leaves it missing."""
+        rollout = bridge_server._state_dir / "rollout.jsonl"
+        if isinstance(entries, bytes):
+            rollout.write_bytes(entries)
+        elif entries is not None:
+            rollout.write_text("".join(json.dumps(e) + "\n" for e in entries))
+        info = dataclasses.replace(sample_session_info, rollout_path=str(rollout))
+        bridge_server._sessions.add(info)
+        return info.conversation_id
+
+    def test_export_skips_blank_malformed_and_non_object_lines(self, bridge_server, sample_session_info):
+        cid = self._add_rollout(
+            bridge_server,
+            sample_session_info,
+            b"\n"
+            b"not json\n"
+            b"[1, 2]\n"
+            + json.dumps({"type": "event_msg", "payload": {"type": "user_message", "message": "hi"}}).encode()
+            + b"\n"
+            + json.dumps({"type": "event_msg", "payload": {"type": "agent_message", "message": "h\u00e9llo"}}).encode(),
+        )
+
+        response = bridge_server._handle_export_session_tool(1, {"conversationId": cid, "format": "json"})
+
+        payload = json.loads(response["result"]["content"][0]["text"])
+        assert [(m["role"], m["content"]) for m in payload["messages"]] == [("user", "hi"), ("assistant", "h\u00e9llo")]
+
+    def test_export_dedups_response_items_and_skips_bad_payloads(self, bridge_server, sample_session_info):
+        entries = [
+            {"type": "event_msg", "payload": "not-a-dict"},
+            {"type": "session_meta", "payload": {"type": "user_message", "message": "ignored"}},
+            {"type": "event_msg", "payload": {"type": "agent_message", "message": "done"}},
+            {"type": "response_item", "payload": {"type": "message", "role": "assistant",
+                                                  "content": [{"type": "output_text", "text": "done"}]}},
+            {"type": "response_item", "payload": {"type": "message", "role": "system",
+                                                  "content": [{"type": "input_text", "text": "sys"}]}},
+            {"type": "response_item", "payload": {"type": "message", "role": "user",
+                                                  "content": [{"type": "input_text", "text": "a"},
+                                                              {"type": "input_text", "text": "b"}]}},
+        ]
+        cid = self._add_rollout(bridge_server, sample_session_info, entries)
+
+        response = bridge_server._handle_export_session_tool(1, {"conversationId": cid, "format": "json"})
+
+        payload = json.loads(response["result"]["content"][0]["text"])
+        assert [(m["role"], m["content"]) for m in payload["messages"]] == [("assistant", "done"), ("user", "a\nb")]
+
+    def test_export_markdown_layout(self, bridge_server, sample_session_info):
+        entries = [
+            {"type": "event_msg", "timestamp": "t1", "payload": {"type": "user_message", "message": "hi"}},
+            {"type": "event_msg", "payload": {"type": "agent_message", "message": "hello"}},
+        ]
+        cid = self._add_rollout(bridge_server, sample_session_info, entries)
+
+        response = bridge_server._handle_export_session_tool(1, {"conversationId": cid})
+
+        markdown = json.loads(response["result"]["content"][0]["text"])["content"]
+        assert markdown == (
+            "# Codex Session: test-conv-123\n\n## Metadata\n- **Conversation ID**: `test-conv-123`\n"
+            "- **Model**: gpt-5.2\n- **Sandbox**: read-only\n- **Reasoning Effort**: high\n\n"
+            "## Conversation\n\n### User (t1)\n\nhi\n\n### Assistant \n\nhello\n"
+        )
+
+    def test_export_dedups_interleaved_response_items(self, bridge_server, sample_session_info):
+        def item(role, text):
+            kind = "input_text" if role == "user" else "output_text"
+            return {"type": "response_item",
+                    "payload": {"type": "message", "role": role, "content": [{"type": kind, "text": text}]}}
+
+        entries = [
+            {"type": "event_msg", "payload": {"type": "user_message", "message": "hi"}},
+            {"type": "event_msg", "payload": {"type": "agent_message", "message": "ok"}},
+            item("user", "hi"),
+            item("assistant", "ok"),
+            item("assistant", "new"),
+        ]
+        cid = self._add_rollout(bridge_server, sample_session_info, entries)
+
+        response = bridge_server._handle_export_session_tool(1, {"conversationId": cid, "format": "json"})
+
+        payload = json.loads(response["result"]["content"][0]["text"])
+        assert [m["content"] for m in payload["messages"]] == ["hi", "ok", "new"]
+
+    def test_export_stops_at_max_messages(self, bridge_server, sample_session_info):
+        entries = [{"type": "event_msg", "payload": {"type": "user_message", "message": f"m{i}"}} for i in range(5)]
+        cid = self._add_rollout(bridge_server, sample_session_info, entries)
+
+        capped = bridge_server._handle_export_session_tool(1, {"conversationId": cid, "format": "json", "maxMessages": 2})
+        full = bridge_server._handle_export_session_tool(2, {"conversationId": cid, "format": "json"})
+
+        capped_payload = json.loads(capped["result"]["content"][0]["text"])
+        full_payload = json.loads(full["result"]["content"][0]["text"])
+        assert [m["content"] for m in capped_payload["messages"]] == ["m0", "m1"]
+        assert capped_payload["truncated"] is True
+        assert len(full_payload["messages"]) == 5
+        assert "truncated" not in full_payload
+
+    def test_export_exactly_max_messages_not_truncated(self, bridge_server, sample_session_info):
+        entries = [
+            {"type": "event_msg", "payload": {"type": "user_message", "message": "m0"}},
+            {"type": "event_msg", "payload": {"type": "agent_message", "message": "m1"}},
+            {"type": "event_msg", "payload": {"type": "token_count"}},
+            {"type": "response_item", "payload": {"type": "message", "role": "assistant",
+                                                  "content": [{"type": "output_text", "text": "m1"}]}},
+        ]
+        raw = "".join(json.dumps(e) + "\n" for e in entries) + "\nnot json\n"
+        cid = self._add_rollout(bridge_server, sample_session_info, raw.encode())
+
+        response = bridge_server._handle_export_session_tool(1, {"conversationId": cid, "format": "json", "maxMessages": 2})
+
+        payload = json.loads(response["result"]["content"][0]["text"])
+        assert [m["content"] for m in payload["messages"]] == ["m0", "m1"]
+        assert "truncated" not in payload
+
+    def test_read_rollout_count_lines_opt_out(self, bridge_server, sample_session_info):
+        cid = self._add_rollout(bridge_server, sample_session_info, b"a\nb\nc\n")
+
+        counted = bridge_server._handle_read_rollout_tool(1, {"conversationId": cid, "lines": 2})
+        uncounted = bridge_server._handle_read_rollout_tool(2, {"conversationId": cid, "lines": 2, "countLines": False})
+
+        counted_payload = json.loads(counted["result"]["content"][0]["text"])
+        uncounted_payload = json.loads(uncounted["result"]["content"][0]["text"])
+        assert counted_payload["totalLines"] == 3
+        assert uncounted_payload["totalLines"] is None
+        assert counted_payload["content"] == uncounted_payload["content"] == "b\nc\n"
+
+    def test_missing_rollout_reported_as_not_found(self, bridge_server, sample_session_info):
+        cid = self._add_rollout(bridge_server, sample_session_info, None)
+        missing = bridge_server._sessions.get(cid).rollout_path
+
+        for response in (
+            bridge_server._handle_export_session_tool(1, {"conversationId": cid}),
+            bridge_server._handle_read_rollout_tool(2, {"conversationId": cid}),
+        ):
+            assert response["result"]["isError"] is True
+            assert response["result"]["content"][0]["text"] == f"Rollout file not found: {missing}"
+
+        deleted = bridge_server._handle_delete_session_tool(3, {"conversationId": cid, "deleteRollout": True})
+        result = json.loads(deleted["result"]["content"][0]["text"])
+        assert result == {"deleted": True, "conversationId": cid, "rolloutDeleted": False}
+
+
+class TestMainLoop:
+    """Runs the bridge script end to end over stdin/stdout."""
+
+    def test_binary_stdin_frames(self, temp_state_dir: Path):
+        script = Path(__file__).parent.parent / "codex_bridge_mcp.py"
+        env = dict(os.environ, CODEX_BRIDGE_STATE_DIR=str(temp_state_dir))
+        frames = b"".join(
+            [
+                b'{"jsonrpc":"2.0","id":1,"method":"tools/call","params":{"name":"codex-bridge-sessions","arguments":{"query":"\xc3\xa9t\xc3\xa9"}}}\n',
+                b"\n",
+                b'{"jsonrpc":"2.0","id":2,\xff}\n',
+                b'{"jsonrpc":"2.0","id":3,"method":"shutdown"}\n',
+            ]
+        )
+
+        proc = subprocess.run(
+            [sys.executable, str(script)], input=frames, capture_output=True, env=env, timeout=30
+        )
+
+        responses = [json.loads(line) for line in proc.stdout.splitlines()]
+        by_id = {r.get("id"): r for r in responses}
+        assert by_id[1]["result"]["isError"] is False
+        assert by_id[None]["error"]["code"] == cbm.JSONRPC_PARSE_ERROR
+        assert by_id[3]["result"] is None
+        assert proc.returncode == 0
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX signals")
+    def test_sigterm_shuts_down_cleanly(self, temp_state_dir: Path):
+        script = Path(__file__).parent.parent / "codex_bridge_mcp.py"
+        env = dict(os.environ, CODEX_BRIDGE_STATE_DIR=str(temp_state_dir))
+        proc = subprocess.Popen(
+            [sys.executable, str(script)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        try:
+            proc.stdin.write(b'{"jsonrpc":"2.0","id":1,"method":"prompts/list"}\n')
+            proc.stdin.flush()
+            assert json.loads(proc.stdout.readline())["id"] == 1
+
+            proc.terminate()
+            assert proc.wait(timeout=10) == 0
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.stderr.close()
+
+    def test_stdin_from_regular_file(self, temp_state_dir: Path, tmp_path: Path):
+        script = Path(__file__).parent.parent / "codex_bridge_mcp.py"
+        env = dict(os.environ, CODEX_BRIDGE_STATE_DIR=str(temp_state_dir))
+        frames = tmp_path / "frames.jsonl"
+        frames.write_bytes(
+            b'{"jsonrpc":"2.0","id":1,"method":"prompts/list"}\n'
+            b'{"jsonrpc":"2.0","id":2,"method":"shutdown"}'
+        )
+
+        with frames.open("rb") as stdin:
+            proc = subprocess.run(
+                [sys.executable, str(script)], stdin=stdin, capture_output=True, env=env, timeout=30
+            )
+
+        assert [json.loads(line)["id"] for line in proc.stdout.splitlines()] == [1, 2]
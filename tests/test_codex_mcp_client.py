@@ -292,6 +292,24 @@ class TestWaitForResponseLogic:
 
         assert cancelled
 
+    def test_pending_reply_first_outcome_wins(self):
+        reply = cbm._PendingReply()
+        msg = {"jsonrpc": "2.0", "id": 1, "result": "ok"}
+
+        reply.resolve(msg)
+        reply.fail(cbm.CancelledError("late cancel"))
+
+        assert reply.result() is msg
+
+    def test_pending_reply_failure_not_overwritten(self):
+        reply = cbm._PendingReply()
+
+        reply.fail(cbm.CancelledError("cancelled"))
+        reply.resolve({"jsonrpc": "2.0", "id": 1, "result": "late"})
+
+        with pytest.raises(cbm.CancelledError):
+            reply.result()
+
 
 class TestClientStateManagement:
     """Tests for client state management patterns."""
@@ -330,3 +348,66 @@ class TestClientStateManagement:
 
         # Cache should have been cleared
         assert len(session_cache) <= max_size + 1
+
+
+class TestCodexMcpClientSubprocess:
+    """End-to-end tests against a fake Codex MCP server subprocess."""
+
+    def test_initialize_and_list_tools(self, fake_client: cbm.CodexMcpClient):
+        assert fake_client.server_info() == {"name": "fake-codex", "version": "0.0.1"}
+        names = [t["name"] for t in fake_client.list_tools()]
+        assert names == ["codex", "codex-reply"]
+
+    def test_call_tool_roundtrips_non_ascii(self, fake_client: cbm.CodexMcpClient):
+        rid, resp = fake_client.call_tool(
+            "codex", {"prompt": "h\u00e9llo \u2603"}, timeout_s=5.0, cancel_event=None
+        )
+        assert resp["result"]["content"][0]["text"] == "echo: h\u00e9llo \u2603"
+        info = fake_client.get_session_for_request(rid, timeout_s=1.0, cancel_event=None)
+        assert info is not None
+        assert info.conversation_id == f"fake-{rid}"
+
+    def test_timeout_clears_pending(self, fake_client: cbm.CodexMcpClient):
+        with pytest.raises(TimeoutError):
+            fake_client.call_tool("codex", {"prompt": "hang"}, timeout_s=0.3, cancel_event=None)
+        assert fake_client._pending == {}
+
+    def test_cancel_clears_pending(self, fake_client: cbm.CodexMcpClient):
+        cancel_event = threading.Event()
+        threading.Timer(0.1, cancel_event.set).start()
+        with pytest.raises(cbm.CancelledError):
+            fake_client.call_tool("codex", {"prompt": "hang"}, timeout_s=5.0, cancel_event=cancel_event)
+        assert fake_client._pending == {}
+
+    def test_cancel_event_wakes_waiter_immediately(self, fake_client: cbm.CodexMcpClient):
+        cancel_event = cbm.CancelEvent()
+        threading.Timer(0.1, cancel_event.set).start()
+        start = time.monotonic()
+        with pytest.raises(cbm.CancelledError):
+            fake_client.call_tool("codex", {"prompt": "hang"}, timeout_s=30.0, cancel_event=cancel_event)
+        assert time.monotonic() - start < 1.0
+        assert fake_client._pending == {}
+        assert cancel_event._callbacks == []
+
+    def test_process_exit_fails_pending_request(self, fake_client: cbm.CodexMcpClient):
+        start = time.monotonic()
+        with pytest.raises(RuntimeError, match="exited"):
+            fake_client.call_tool("codex", {"prompt": "exit"}, timeout_s=30.0, cancel_event=None)
+        assert time.monotonic() - start < 5.0
+        with pytest.raises(RuntimeError, match="exited"):
+            fake_client.list_tools(timeout_s=30.0)
+
+    def test_send_after_close_raises_runtime_error(self, fake_client: cbm.CodexMcpClient):
+        fake_client.close()
+        with pytest.raises(RuntimeError, match="exited"):
+            fake_client._send({"jsonrpc": "2.0", "method": "ping"})
+
+    def test_session_capture_evicts_oldest_only(self, fake_client: cbm.CodexMcpClient, monkeypatch):
+        monkeypatch.setattr(cbm, "_SESSION_BY_REQUEST_ID_MAX", 2)
+        rids = [
+            fake_client.call_tool("codex", {"prompt": str(i)}, timeout_s=5.0, cancel_event=None)[0]
+            for i in range(3)
+        ]
+        assert fake_client.get_session_for_request(rids[2], timeout_s=1.0, cancel_event=None) is not None
+        assert fake_client.get_session_for_request(rids[1], timeout_s=1.0, cancel_event=None) is not None
+        assert list(fake_client._session_by_request_id) == rids[1:]
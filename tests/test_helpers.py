@@ -1,9 +1,11 @@
 """Tests for helper functions in codex_bridge_mcp."""
 from __future__ import annotations
 
+import json
 import os
 import sys
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -76,6 +78,50 @@ class TestFindCodexBinary:
                         assert "CODEX_BINARY" in str(exc_info.value)
 
 
+class TestFindVscodeCodexBinary:
+    """Tests for the VS Code extension fallback and its on-disk cache."""
+
+    def _make_binary(self, home: Path, ext: str, platform: str = "linux-x86_64") -> Path:
+        binary = home / ".vscode" / "extensions" / ext / "bin" / platform / "codex"
+        binary.parent.mkdir(parents=True)
+        binary.touch()
+        return binary
+
+    def test_returns_none_without_extensions(self, temp_state_dir: Path):
+        with patch("pathlib.Path.home", return_value=temp_state_dir / "home"):
+            assert cbm._find_vscode_codex_binary(temp_state_dir) is None
+
+    def test_picks_newest_binary(self, temp_state_dir: Path):
+        home = temp_state_dir / "home"
+        old = self._make_binary(home, "openai.chatgpt-1.0.0")
+        new = self._make_binary(home, "openai.chatgpt-2.0.0", platform="darwin-arm64")
+        os.utime(old, ns=(1_000_000_000, 1_000_000_000))
+
+        with patch("pathlib.Path.home", return_value=home):
+            assert cbm._find_vscode_codex_binary(None) == str(new)
+
+    def test_reuses_cached_result(self, temp_state_dir: Path):
+        home = temp_state_dir / "home"
+        state_dir = temp_state_dir / "state"
+        binary = self._make_binary(home, "openai.chatgpt-1.0.0")
+
+        with patch("pathlib.Path.home", return_value=home):
+            assert cbm._find_vscode_codex_binary(state_dir) == str(binary)
+            with patch.object(cbm, "_iter_extension_codex_binaries") as scan:
+                assert cbm._find_vscode_codex_binary(state_dir) == str(binary)
+                scan.assert_not_called()
+
+    def test_cache_invalidated_when_binary_removed(self, temp_state_dir: Path):
+        home = temp_state_dir / "home"
+        state_dir = temp_state_dir / "state"
+        binary = self._make_binary(home, "openai.chatgpt-1.0.0")
+
+        with patch("pathlib.Path.home", return_value=home):
+            assert cbm._find_vscode_codex_binary(state_dir) == str(binary)
+            binary.unlink()
+            assert cbm._find_vscode_codex_binary(state_dir) is None
+
+
 class TestGetStateDir:
     """Tests for _get_state_dir function."""
 
@@ -201,6 +247,90 @@ class TestGetCodexVersion:
             version = cbm._get_codex_version("/usr/bin/codex")
             assert version is None
 
+    def test_caches_per_binary_mtime(self, temp_state_dir: Path, monkeypatch):
+        monkeypatch.setattr(cbm, "_codex_version_cache", {})
+        binary = temp_state_dir / "codex"
+        binary.touch()
+        with patch("codex_bridge_mcp._run_cmd", return_value=(0, "codex 1.2.3\n", "")) as run:
+            assert cbm._get_codex_version(str(binary)) == "codex 1.2.3"
+            assert cbm._get_codex_version(str(binary)) == "codex 1.2.3"
+            assert run.call_count == 1
+
+            os.utime(binary, ns=(1_000_000_000, 1_000_000_000))
+            assert cbm._get_codex_version(str(binary)) == "codex 1.2.3"
+            assert run.call_count == 2
+
+    def test_does_not_cache_failures(self, temp_state_dir: Path, monkeypatch):
+        monkeypatch.setattr(cbm, "_codex_version_cache", {})
+        binary = temp_state_dir / "codex"
+        binary.touch()
+        with patch("codex_bridge_mcp._run_cmd", return_value=(1, "", "error")) as run:
+            assert cbm._get_codex_version(str(binary)) is None
+            assert cbm._get_codex_version(str(binary)) is None
+            assert run.call_count == 2
+
+
+class TestEnsureSchemaCache:
+    """Tests for _ensure_schema_cache memoization."""
+
+    @pytest.fixture
+    def codex_binary(self, tmp_path: Path, monkeypatch) -> str:
+        monkeypatch.setattr(cbm, "_schema_path_cache", {})
+        binary = tmp_path / "codex"
+        binary.write_text("")
+        return str(binary)
+
+    def test_failed_generation_not_retried_within_cooldown(self, temp_state_dir: Path, codex_binary: str):
+        with patch("codex_bridge_mcp._get_codex_version", return_value="codex 1.0"), patch(
+            "codex_bridge_mcp.subprocess.run"
+        ) as run:
+            assert cbm._ensure_schema_cache(codex_binary, temp_state_dir) is None
+            assert cbm._ensure_schema_cache(codex_binary, temp_state_dir) is None
+            assert run.call_count == 1
+
+    def test_failed_generation_retried_after_cooldown(self, temp_state_dir: Path, codex_binary: str, monkeypatch):
+        with patch("codex_bridge_mcp._get_codex_version", return_value="codex 1.0"), patch(
+            "codex_bridge_mcp.subprocess.run"
+        ) as run:
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            later = time.monotonic() + cbm._SCHEMA_FAILURE_RETRY_S + 1
+            monkeypatch.setattr(cbm.time, "monotonic", lambda: later)
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            assert run.call_count == 2
+
+    def test_failed_generation_retried_when_binary_changes(self, temp_state_dir: Path, codex_binary: str):
+        with patch("codex_bridge_mcp._get_codex_version", return_value="codex 1.0"), patch(
+            "codex_bridge_mcp.subprocess.run"
+        ) as run:
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            os.utime(codex_binary, ns=(1_000_000_000, 1_000_000_000))
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            assert run.call_count == 2
+
+    def test_unknown_version_failure_is_retried(self, temp_state_dir: Path, codex_binary: str):
+        with patch("codex_bridge_mcp._get_codex_version", return_value=None), patch(
+            "codex_bridge_mcp.subprocess.run"
+        ) as run:
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            cbm._ensure_schema_cache(codex_binary, temp_state_dir)
+            assert run.call_count == 2
+
+    def test_removed_schema_is_regenerated(self, temp_state_dir: Path, codex_binary: str):
+        schema = temp_state_dir / "schema-cache" / "codex 1.0" / "codex_app_server_protocol.schemas.json"
+
+        def generate(argv, **kwargs):
+            schema.write_text("{}")
+
+        with patch("codex_bridge_mcp._get_codex_version", return_value="codex 1.0"), patch(
+            "codex_bridge_mcp.subprocess.run", side_effect=generate
+        ) as run:
+            assert cbm._ensure_schema_cache(codex_binary, temp_state_dir) == schema
+            assert cbm._ensure_schema_cache(codex_binary, temp_state_dir) == schema
+            assert run.call_count == 1
+            schema.unlink()
+            assert cbm._ensure_schema_cache(codex_binary, temp_state_dir) == schema
+            assert run.call_count == 2
+
 
 class TestExtractText:
     """Tests for _extract_text helper function."""
@@ -216,6 +346,16 @@ class TestExtractText:
         assert "First" in text
         assert "Second" in text
 
+    def test_single_text_part_returned_as_is(self):
+        text_value = "x" * 10_000
+        result = {"content": [{"type": "text", "text": text_value}]}
+        assert cbm._extract_text(result) is text_value
+
+    def test_single_non_string_text_part_falls_through(self):
+        result = {"content": [{"type": "text", "text": 42}]}
+        text = cbm._extract_text(result)
+        assert "content" in text
+
     def test_handles_non_text_content(self):
         result = {
             "content": [
@@ -240,3 +380,58 @@ class TestExtractText:
         text = cbm._extract_text(result)
         # Falls through to _json_dumps(result)
         assert text == "{}"
+
+
+class TestExtractEnumsFromSchema:
+    """Tests for _extract_enums_from_schema."""
+
+    def _write_schema(self, path: Path, efforts) -> None:
+        schema = {"definitions": {"v2": {"ReasoningEffort": {"enum": efforts}}}}
+        path.write_text(json.dumps(schema))
+
+    def test_extracts_and_caches_by_mtime(self, temp_state_dir: Path, monkeypatch):
+        monkeypatch.setattr(cbm, "_schema_enums_cache", {})
+        schema_path = temp_state_dir / "schema.json"
+        self._write_schema(schema_path, ["low", "high"])
+
+        with patch.object(cbm, "_parse_schema_enums", wraps=cbm._parse_schema_enums) as parse:
+            first = cbm._extract_enums_from_schema(schema_path)
+            first["reasoningEffort"] = ["mutated"]
+            second = cbm._extract_enums_from_schema(schema_path)
+            assert parse.call_count == 1
+
+            self._write_schema(schema_path, ["medium"])
+            os.utime(schema_path, ns=(1_000_000_000, 1_000_000_000))
+            third = cbm._extract_enums_from_schema(schema_path)
+            assert parse.call_count == 2
+
+        assert second["reasoningEffort"] == ["low", "high"]
+        assert third["reasoningEffort"] == ["medium"]
+
+    def test_missing_file_returns_empty(self, temp_state_dir: Path):
+        assert cbm._extract_enums_from_schema(temp_state_dir / "missing.json") == {}
+
+    def test_one_of_variants_are_merged_in_order_without_duplicates(self, temp_state_dir: Path):
+        schema_path = temp_state_dir / "schema.json"
+        summary = {"oneOf": [{"enum": ["auto", "concise"]}, {"type": "null"}, {"enum": ["concise", "detailed"]}]}
+        schema_path.write_text(json.dumps({"definitions": {"v2": {"ReasoningSummary": summary}}}))
+
+        enums = cbm._parse_schema_enums(schema_path)
+
+        assert enums["reasoningSummary"] == ["auto", "concise", "detailed"]
+        assert enums["networkAccess"] == []
+
+
+class TestIntArg:
+    """Tests for _int_arg function."""
+
+    def test_missing_uses_default(self):
+        assert cbm._int_arg({}, "lines", 50, 1, 500) == 50
+
+    def test_non_int_uses_default(self):
+        assert cbm._int_arg({"lines": "10"}, "lines", 50, 1, 500) == 50
+
+    def test_clamped_to_range(self):
+        assert cbm._int_arg({"lines": 0}, "lines", 50, 1, 500) == 1
+        assert cbm._int_arg({"lines": 9999}, "lines", 50, 1, 500) == 500
+        assert cbm._int_arg({"lines": 42}, "lines", 50, 1, 500) == 42
@@ -1,6 +1,8 @@
 """Tests for SessionInfo dataclass."""
 from __future__ import annotations
 
+import dataclasses
+import json
 import sys
 import time
 from pathlib import Path
@@ -206,3 +208,40 @@ class TestSessionInfoSerialization:
 
         assert isinstance(json_str, str)
         assert "test-conv-123" in json_str
+
+    def test_to_record_matches_fields(self, sample_session_info: cbm.SessionInfo):
+        from dataclasses import asdict
+
+        assert sample_session_info.to_record() == asdict(sample_session_info)
+
+    def test_json_line_is_cached_record(self, sample_session_info: cbm.SessionInfo):
+        line = sample_session_info.json_line
+
+        assert line.endswith(b"\n")
+        assert json.loads(line) == sample_session_info.to_record()
+        assert sample_session_info.json_line is line
+
+    def test_json_line_reflects_name_change(self, sample_session_info: cbm.SessionInfo):
+        renamed = sample_session_info.with_name("renamed")
+
+        assert json.loads(renamed.json_line)["name"] == "renamed"
+
+    def test_payload_is_cached_camel_case(self, sample_session_info: cbm.SessionInfo):
+        payload = sample_session_info.payload
+
+        assert payload["conversationId"] == sample_session_info.conversation_id
+        assert payload["historyEntryCount"] == sample_session_info.history_entry_count
+        assert cbm._session_info_payload(sample_session_info) is payload
+        assert sample_session_info.with_name("renamed").payload["name"] == "renamed"
+
+    def test_derived_payloads_match_fresh_build(self, sample_session_info: cbm.SessionInfo):
+        sample_session_info.payload  # warm the cache
+
+        bumped = sample_session_info.with_incremented_history()
+        renamed = sample_session_info.with_name("renamed")
+
+        for derived in (bumped, renamed):
+            fresh = cbm.SessionInfo(**dataclasses.asdict(derived))
+            assert derived.payload == fresh.payload
+        assert bumped.payload["historyEntryCount"] == (sample_session_info.history_entry_count or 0) + 1
+        assert sample_session_info.payload["name"] != "renamed"
@@ -65,6 +65,49 @@ class TestSessionStoreInit:
         assert store.get("valid-1") is not None
         assert store.get("valid-2") is not None
 
+    def test_loads_empty_file(self, temp_state_dir: Path):
+        (temp_state_dir / "sessions.jsonl").write_bytes(b"")
+
+        store = cbm.SessionStore(temp_state_dir)
+
+        assert store.count() == 0
+
+    def test_loads_last_line_without_newline(self, temp_state_dir: Path):
+        (temp_state_dir / "sessions.jsonl").write_bytes(
+            b'{"conversation_id": "a", "captured_at": 1.0}\n'
+            b"\xff\xfe not utf-8\n"
+            b'{"conversation_id": "b", "captured_at": 2.0}'
+        )
+
+        store = cbm.SessionStore(temp_state_dir)
+
+        assert store.count() == 2
+        assert store.get("b") is not None
+
+    def test_loaded_sessions_share_repeated_strings(self, temp_state_dir: Path):
+        (temp_state_dir / "sessions.jsonl").write_bytes(
+            b'{"conversation_id": "a", "captured_at": 1.0, "model": "gpt-x", "cwd": "/w", "rollout_path": "/r/a"}\n'
+            b'{"conversation_id": "b", "captured_at": 2.0, "model": "gpt-x", "cwd": "/w", "rollout_path": "/r/b"}\n'
+        )
+
+        store = cbm.SessionStore(temp_state_dir)
+
+        a, b = store.get("a"), store.get("b")
+        assert a.model is b.model
+        assert a.cwd is b.cwd
+
+    def test_loads_crlf_and_blank_lines(self, temp_state_dir: Path):
+        (temp_state_dir / "sessions.jsonl").write_bytes(
+            b'  {"conversation_id": "a", "captured_at": 1.0}\r\n'
+            b"\r\n"
+            b"   \n"
+            b'{"conversation_id": "b", "captured_at": 2.0}\r\n'
+        )
+
+        store = cbm.SessionStore(temp_state_dir)
+
+        assert [s["conversationId"] for s in store.list()["data"]] == ["b", "a"]
+
 
 class TestSessionStoreAdd:
     """Tests for SessionStore.add method."""
@@ -128,6 +171,58 @@ class TestSessionStoreAdd:
         assert retrieved.model == "model-v1"  # First one wins
         assert retrieved.captured_at == 100.0
 
+    def test_add_many_single_append(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+
+        store.add_many(
+            [
+                cbm.SessionInfo(conversation_id="b", captured_at=2.0),
+                cbm.SessionInfo(conversation_id="a", captured_at=3.0),  # already known
+                cbm.SessionInfo(conversation_id="c", captured_at=4.0),
+                cbm.SessionInfo(conversation_id="b", captured_at=5.0),  # duplicate within batch
+            ]
+        )
+
+        assert store.count() == 3
+        assert store.get("b").captured_at == 2.0
+        lines = (temp_state_dir / "sessions.jsonl").read_text().splitlines()
+        assert [json.loads(line)["conversation_id"] for line in lines] == ["a", "b", "c"]
+
+    def test_membership_version_tracks_adds_and_deletes_only(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        v0 = store.membership_version
+
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+        v1 = store.membership_version
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=2.0))  # already known
+        store.update("a", name="renamed")
+        store.increment_history("a")
+        assert store.membership_version == v1 > v0
+
+        store.delete("a")
+        assert store.membership_version > v1
+
+    def test_models_track_live_sessions(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add_many(
+            [
+                cbm.SessionInfo(conversation_id="a", captured_at=1.0, model="o3"),
+                cbm.SessionInfo(conversation_id="b", captured_at=2.0, model="gpt-5.2"),
+                cbm.SessionInfo(conversation_id="c", captured_at=3.0, model="o3"),
+                cbm.SessionInfo(conversation_id="d", captured_at=4.0),
+            ]
+        )
+        assert store.models() == ["o3", "gpt-5.2"]
+
+        store.delete("a")
+        assert store.models() == ["o3", "gpt-5.2"]
+        store.delete("c")
+        assert store.models() == ["gpt-5.2"]
+
+        store.close()
+        assert cbm.SessionStore(temp_state_dir).models() == ["gpt-5.2"]
+
 
 class TestSessionStoreGet:
     """Tests for SessionStore.get method."""
@@ -147,6 +242,90 @@ class TestSessionStoreGet:
         assert result is None
 
 
+class TestSessionStoreSearch:
+    """Tests for SessionStore.search method."""
+
+    def test_case_insensitive_newest_first(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="Auth Review"))
+        session_store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0))
+        session_store.add(cbm.SessionInfo(conversation_id="c", captured_at=3.0, name="auth-tokens"))
+
+        results = session_store.search("AUTH")
+
+        assert [info.conversation_id for info in results] == ["c", "a"]
+        assert session_store.search("") == [session_store.get("c"), session_store.get("a")]
+
+    def test_sees_renames(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="old"))
+        assert session_store.search("old")
+
+        session_store.update("a", name="Fresh Name")
+
+        assert session_store.search("old") == []
+        assert [i.conversation_id for i in session_store.search("fresh")] == ["a"]
+
+    def test_respects_limit(self, session_store: cbm.SessionStore):
+        for i in range(5):
+            session_store.add(cbm.SessionInfo(conversation_id=f"s{i}", captured_at=float(i), name=f"topic {i}"))
+
+        assert [i.conversation_id for i in session_store.search("topic", limit=2)] == ["s4", "s3"]
+
+    def test_matches_do_not_span_names(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="ab"))
+        session_store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0, name="cd"))
+
+        assert session_store.search("bc") == []
+        assert session_store.search("b\0c") == []
+        assert [i.conversation_id for i in session_store.search("d")] == ["b"]
+
+    def test_sees_adds_and_deletes(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="report"))
+        assert [i.conversation_id for i in session_store.search("rep")] == ["a"]
+
+        session_store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0, name="repo sync"))
+        assert [i.conversation_id for i in session_store.search("rep")] == ["b", "a"]
+
+        session_store.delete("b")
+        assert [i.conversation_id for i in session_store.search("rep")] == ["a"]
+
+    def test_repeated_match_in_one_name_counts_once(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="aaaa"))
+        session_store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0, name="xaax"))
+
+        assert [i.conversation_id for i in session_store.search("aa")] == ["b", "a"]
+
+
+class TestSessionStoreSearchPage:
+    """Tests for SessionStore.search_page method."""
+
+    def test_pages_through_matches(self, session_store: cbm.SessionStore):
+        for i in range(5):
+            session_store.add(cbm.SessionInfo(conversation_id=f"s{i}", captured_at=float(i), name=f"topic {i}"))
+        session_store.add(cbm.SessionInfo(conversation_id="other", captured_at=9.0, name="unrelated"))
+
+        first = session_store.search_page("topic", limit=2)
+        second = session_store.search_page("topic", limit=2, cursor=first["nextCursor"])
+        last = session_store.search_page("topic", limit=2, cursor=second["nextCursor"])
+
+        assert [d["conversationId"] for d in first["data"]] == ["s4", "s3"]
+        assert [d["conversationId"] for d in second["data"]] == ["s2", "s1"]
+        assert [d["conversationId"] for d in last["data"]] == ["s0"]
+        assert last["nextCursor"] is None
+
+    def test_exact_final_page_has_no_cursor(self, session_store: cbm.SessionStore):
+        for i in range(2):
+            session_store.add(cbm.SessionInfo(conversation_id=f"s{i}", captured_at=float(i), name="topic"))
+
+        assert session_store.search_page("topic", limit=2)["nextCursor"] is None
+
+    def test_invalid_cursor_starts_from_beginning(self, session_store: cbm.SessionStore):
+        session_store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0, name="topic"))
+
+        page = session_store.search_page("topic", limit=5, cursor="bogus")
+
+        assert [d["conversationId"] for d in page["data"]] == ["a"]
+
+
 class TestSessionStoreList:
     """Tests for SessionStore.list method (returns dict, not tuple)."""
 
@@ -212,6 +391,25 @@ class TestSessionStoreList:
         all_ids = [s["conversationId"] for s in page1["data"] + page2["data"] + page3["data"]]
         assert len(all_ids) == len(set(all_ids))
 
+    def test_list_newest_first_across_pages(self, session_store: cbm.SessionStore):
+        for i in range(5):
+            session_store.add(cbm.SessionInfo(conversation_id=f"s{i}", captured_at=float(i)))
+
+        page1 = session_store.list(limit=2)
+        page2 = session_store.list(limit=2, cursor=page1["nextCursor"])
+        page3 = session_store.list(limit=2, cursor=page2["nextCursor"])
+
+        ids = [d["conversationId"] for page in (page1, page2, page3) for d in page["data"]]
+        assert ids == ["s4", "s3", "s2", "s1", "s0"]
+
+    def test_cursor_past_end_returns_empty(self, session_store: cbm.SessionStore):
+        for i in range(3):
+            session_store.add(cbm.SessionInfo(conversation_id=f"s{i}", captured_at=float(i)))
+
+        result = session_store.list(limit=2, cursor="7")
+
+        assert result == {"data": [], "nextCursor": None}
+
     def test_invalid_cursor_starts_from_beginning(self, session_store: cbm.SessionStore):
         for i in range(5):
             info = cbm.SessionInfo(
@@ -287,6 +485,8 @@ class TestSessionStoreThreadSafety:
                     store.list(limit=5)
                     store.get("initial-5")
                     store.count()
+                    store.search("new", limit=5)
+                    store.values()
                 except Exception as e:
                     errors.append(e)
 
@@ -355,3 +555,81 @@ class TestSessionStorePersistence:
         assert store3.count() == 2
         assert store3.get("first") is not None
         assert store3.get("second") is not None
+
+    def test_append_after_rewrite(self, temp_state_dir: Path, monkeypatch):
+        monkeypatch.setattr(cbm, "_SESSIONS_COMPACT_MIN_STALE", 0)
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="first", captured_at=100.0))
+        store.add(cbm.SessionInfo(conversation_id="second", captured_at=200.0))
+        store.delete("first")  # compacts: truncates and rewrites the file in place
+        store.add(cbm.SessionInfo(conversation_id="third", captured_at=300.0))
+
+        lines = (temp_state_dir / "sessions.jsonl").read_text().splitlines()
+        assert [json.loads(line)["conversation_id"] for line in lines] == ["second", "third"]
+
+    def test_mutations_append_instead_of_rewriting(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+        store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0))
+        store.add(cbm.SessionInfo(conversation_id="c", captured_at=3.0))
+        store.update("a", name="renamed")
+        store.increment_history("b")
+        store.delete("c")
+
+        lines = [json.loads(line) for line in (temp_state_dir / "sessions.jsonl").read_text().splitlines()]
+        assert len(lines) == 6
+        assert lines[-1] == {"conversation_id": "c", "_deleted": True}
+
+        reloaded = cbm.SessionStore(temp_state_dir)
+        assert [s["conversationId"] for s in reloaded.list()["data"]] == ["b", "a"]
+        assert reloaded.get("a").name == "renamed"
+        assert reloaded.get("b").history_entry_count == 1
+        assert reloaded.get("c") is None
+
+    def test_readd_after_delete_moves_to_newest(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+        store.add(cbm.SessionInfo(conversation_id="b", captured_at=2.0))
+        store.delete("a")
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=3.0))
+
+        for s in (store, cbm.SessionStore(temp_state_dir)):
+            assert [x["conversationId"] for x in s.list()["data"]] == ["a", "b"]
+
+    def test_compacts_when_stale_lines_dominate(self, temp_state_dir: Path, monkeypatch):
+        monkeypatch.setattr(cbm, "_SESSIONS_COMPACT_MIN_STALE", 4)
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+        for _ in range(4):
+            store.increment_history("a")
+        path = temp_state_dir / "sessions.jsonl"
+        assert len(path.read_text().splitlines()) == 5
+
+        store.increment_history("a")
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["history_entry_count"] == 5
+
+    def test_compacts_stale_file_on_load(self, temp_state_dir: Path, monkeypatch):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="a", captured_at=1.0))
+        for _ in range(5):
+            store.increment_history("a")
+        store.close()
+
+        monkeypatch.setattr(cbm, "_SESSIONS_COMPACT_MIN_STALE", 2)
+        reloaded = cbm.SessionStore(temp_state_dir)
+
+        assert len((temp_state_dir / "sessions.jsonl").read_text().splitlines()) == 1
+        assert reloaded.get("a").history_entry_count == 5
+
+    def test_close_releases_descriptor(self, temp_state_dir: Path):
+        store = cbm.SessionStore(temp_state_dir)
+        store.add(cbm.SessionInfo(conversation_id="first", captured_at=100.0))
+        store.close()
+        store.close()
+
+        assert store._fd is None
+        store.add(cbm.SessionInfo(conversation_id="second", captured_at=200.0))
+        assert cbm.SessionStore(temp_state_dir).count() == 2
@@ -1,10 +1,15 @@
 """Tests for utility functions in codex_bridge_mcp."""
 from __future__ import annotations
 
+import io
 import json
+import os
 import sys
+import time
 from pathlib import Path
 from io import StringIO
+from typing import List
+from unittest.mock import patch
 
 import pytest
 
@@ -39,6 +44,40 @@ class TestJsonDumps:
         result = cbm._json_dumps({"a": 1, "b": 2})
         assert " " not in result
 
+    def test_non_str_keys_fall_back_to_stdlib(self):
+        result = cbm._json_dumps({1: "a"})
+        assert result == '{"1":"a"}'
+
+    def test_stdlib_fallback_matches(self, monkeypatch):
+        obj = {"a": [1, 2.5, None, True], "b": "caf\u00e9"}
+        fast = cbm._json_dumps(obj)
+        monkeypatch.setattr(cbm, "orjson", None)
+        assert cbm._json_dumps(obj) == fast
+        assert cbm._json_dumpb(obj) == fast.encode("utf-8")
+        assert cbm._json_dumpb_line(obj) == fast.encode("utf-8") + b"\n"
+
+    def test_dumpb_line_appends_newline(self):
+        assert cbm._json_dumpb_line({"a": "\n"}) == b'{"a":"\\n"}\n'
+        assert cbm._json_dumpb_line({1: "a"}) == b'{"1":"a"}\n'
+
+
+class TestJsonLoads:
+    """Tests for _json_loads function."""
+
+    def test_accepts_str_and_bytes(self):
+        assert cbm._json_loads('{"a": 1}') == {"a": 1}
+        assert cbm._json_loads(b'{"a": 1}') == {"a": 1}
+
+    def test_raises_value_error(self):
+        with pytest.raises(ValueError):
+            cbm._json_loads("{bad")
+
+    def test_stdlib_fallback(self, monkeypatch):
+        monkeypatch.setattr(cbm, "orjson", None)
+        assert cbm._json_loads(b'{"a": 1}') == {"a": 1}
+        with pytest.raises(ValueError):
+            cbm._json_loads("{bad")
+
 
 class TestTryParseJson:
     """Tests for _try_parse_json function."""
@@ -85,6 +124,11 @@ class TestTryParseJson:
         assert msg == {"id": 1}
         assert err_code is None
 
+    def test_bytes_line(self):
+        msg, err_code, err_msg = cbm._try_parse_json(b'{"id": 1}\n')
+        assert msg == {"id": 1}
+        assert err_code is None
+
 
 class TestJsonrpcResponse:
     """Tests for _jsonrpc_response function."""
@@ -188,3 +232,162 @@ class TestCancelledError:
     def test_can_raise_and_catch(self):
         with pytest.raises(cbm.CancelledError):
             raise cbm.CancelledError("Task cancelled")
+
+
+class TestIsDispatchableFrame:
+    """Tests for the stdout reader's byte-level pre-filter."""
+
+    def test_response_frames_dispatched(self):
+        assert cbm._is_dispatchable_frame(b'{"jsonrpc":"2.0","id":1,"result":{}}\n')
+        assert cbm._is_dispatchable_frame(b'{"jsonrpc":"2.0","id":1,"error":{"code":-1}}\n')
+
+    def test_session_configured_dispatched(self):
+        frame = {
+            "jsonrpc": "2.0",
+            "method": "codex/event",
+            "params": {"_meta": {"requestId": 3}, "id": "0", "msg": {"type": "session_configured", "session_id": "s"}},
+        }
+        assert cbm._is_dispatchable_frame(json.dumps(frame).encode())
+
+    def test_other_events_skipped(self):
+        frame = {
+            "jsonrpc": "2.0",
+            "method": "codex/event",
+            "params": {"_meta": {"requestId": 3}, "id": "0", "msg": {"type": "agent_message_delta", "delta": 'say "result"'}},
+        }
+        assert not cbm._is_dispatchable_frame(json.dumps(frame).encode())
+
+    def test_event_with_result_payload_skipped(self):
+        frame = (
+            b'{"jsonrpc":"2.0","method":"codex/event","params":{"_meta":{"requestId":3},'
+            b'"msg":{"type":"mcp_tool_call_end","result":{"Ok":{}}}}}\n'
+        )
+        assert not cbm._is_dispatchable_frame(frame)
+
+    def test_response_quoting_event_method_still_dispatched(self):
+        frame = {"jsonrpc": "2.0", "id": 9, "result": {"content": [{"type": "text", "text": '"method":"codex/event"'}]}}
+        assert cbm._is_dispatchable_frame(json.dumps(frame, separators=(",", ":")).encode())
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX pipes")
+class TestIterFdLines:
+    """Tests for the selector-based stdin line splitter."""
+
+    def _pipes(self):
+        r, w = os.pipe()
+        stop_r, stop_w = os.pipe()
+        return r, w, stop_r, stop_w
+
+    def test_splits_frames_across_chunks(self):
+        r, w, stop_r, stop_w = self._pipes()
+        try:
+            os.write(w, b'{"a":1}\n{"b"')
+            os.write(w, b':2}\n\n{"c":3}')
+            os.close(w)
+            w = None
+            lines = list(cbm._iter_fd_lines(r, stop_r, chunk_size=5))
+        finally:
+            for fd in (r, w, stop_r, stop_w):
+                if fd is not None:
+                    os.close(fd)
+        assert lines == [b'{"a":1}', b'{"b":2}', b"", b'{"c":3}']
+
+    def test_stops_when_stop_fd_readable(self):
+        r, w, stop_r, stop_w = self._pipes()
+        try:
+            frames = cbm._iter_fd_lines(r, stop_r)
+            os.write(w, b"first\n")
+            assert next(frames) == b"first"
+            os.write(stop_w, b"\0")
+            assert list(frames) == []
+        finally:
+            for fd in (r, w, stop_r, stop_w):
+                os.close(fd)
+
+    def test_reads_regular_file(self, tmp_path: Path):
+        path = tmp_path / "frames.jsonl"
+        path.write_bytes(b"one\ntwo\n")
+        stop_r, stop_w = os.pipe()
+        fd = os.open(str(path), os.O_RDONLY)
+        try:
+            assert list(cbm._iter_fd_lines(fd, stop_r)) == [b"one", b"two"]
+        finally:
+            for x in (fd, stop_r, stop_w):
+                os.close(x)
+
+    def test_large_frame_split_across_many_reads(self, tmp_path: Path):
+        big = b'{"pad":"' + b"x" * (4 << 20) + b'"}'
+        path = tmp_path / "frames.jsonl"
+        path.write_bytes(b"head\n" + big + b"\ntail")
+        stop_r, stop_w = os.pipe()
+        fd = os.open(str(path), os.O_RDONLY)
+        try:
+            start = time.monotonic()
+            frames = list(cbm._iter_fd_lines(fd, stop_r, chunk_size=4096))
+            elapsed = time.monotonic() - start
+        finally:
+            for x in (fd, stop_r, stop_w):
+                os.close(x)
+        assert frames == [b"head", big, b"tail"]
+        # Over 1000 reads; re-copying the pending frame on each one took seconds.
+        assert elapsed < 2.0
+
+
+class TestForwardPrefixedLines:
+    """Tests for the block-based upstream stderr forwarder."""
+
+    def test_prefixes_lines_split_across_reads(self, capsysbinary):
+        src = io.BufferedReader(io.BytesIO(b"one\ntw\xffo\n\nthree"))
+        cbm._forward_prefixed_lines(src, b"[codex] ", chunk_size=6)
+        assert capsysbinary.readouterr().err == b"[codex] one\n[codex] tw\xffo\n[codex] \n[codex] three\n"
+
+    def test_breaks_lines_longer_than_a_chunk(self, capsysbinary):
+        src = io.BufferedReader(io.BytesIO(b"abcdefgh\n"))
+        cbm._forward_prefixed_lines(src, b"> ", chunk_size=4)
+        assert capsysbinary.readouterr().err == b"> abcd\n> efgh\n"
+
+
+class TestReadTailLines:
+    """Tests for the backwards rollout tail reader."""
+
+    @pytest.mark.parametrize("trailing_newline", [True, False])
+    def test_matches_readlines(self, tmp_path: Path, trailing_newline: bool):
+        body = "".join(f'{{"n": {i}, "pad": "{"x" * (i % 7)}"}}\n' for i in range(200))
+        if not trailing_newline:
+            body = body.rstrip("\n")
+        path = tmp_path / "rollout.jsonl"
+        path.write_text(body)
+        expected = body.splitlines(keepends=True)
+
+        for count in (1, 3, 50, 199, 200, 500):
+            lines, total = cbm._read_tail_lines(path, count, block_size=16)
+            assert total == len(expected)
+            assert b"".join(lines).decode() == "".join(expected[-count:])
+            uncounted, no_total = cbm._read_tail_lines(path, count, count_lines=False, block_size=16)
+            assert no_total is None
+            assert uncounted == lines
+
+    def test_uncounted_reads_only_the_tail(self, tmp_path: Path):
+        path = tmp_path / "rollout.jsonl"
+        path.write_bytes(b"x" * (1 << 20) + b"\nlast\n")
+        read_sizes: List[int] = []
+
+        class CountingReader(io.BufferedReader):
+            def read(self, size=-1):
+                data = super().read(size)
+                read_sizes.append(len(data))
+                return data
+
+        def tracking_open(self, mode="r", *args, **kwargs):
+            return CountingReader(io.FileIO(str(self), "rb"))
+
+        with patch.object(Path, "open", tracking_open):
+            lines, total = cbm._read_tail_lines(path, 1, count_lines=False, block_size=64)
+
+        assert lines == [b"last\n"] and total is None
+        assert sum(read_sizes) <= 128
+
+    def test_empty_file(self, tmp_path: Path):
+        path = tmp_path / "rollout.jsonl"
+        path.write_bytes(b"")
+        assert cbm._read_tail_lines(path, 5) == ([], 0)